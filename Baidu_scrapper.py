@@ -1,44 +1,43 @@
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
-from collections import Counter
-from googletrans import Translator
 import re
-import json
 
+from http_cache import cached_get
+from html_parsing import select_text
+from pagination import fetch_pages
+from pipeline import check_stop
+from translation import get_translation_stage
+from word_store import get_word_store
+from word_counter import WordCounter
 
-def fetch_baidu_news(keyword, num_pages=10):
+
+def fetch_baidu_page(keyword, page):
+    """
+    抓取一页百度新闻搜索结果，返回该页的新闻标题；请求失败时返回空列表。
+    """
     base_url = "https://www.baidu.com/s"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    params = {
+        'tn': 'news',
+        'rtt': '1',
+        'bsst': '1',
+        'cl': '2',
+        'wd': keyword,
+        'pn': page * 10  # 百度每页显示10条新闻
     }
-    news_titles = []
+    response = cached_get(base_url, params=params)
 
-    for page in range(num_pages):
-        params = {
-            'tn': 'news',
-            'rtt': '1',
-            'bsst': '1',
-            'cl': '2',
-            'wd': keyword,
-            'pn': page * 10  # 百度每页显示10条新闻
-        }
-        response = requests.get(base_url, params=params, headers=headers)
+    if response.status_code != 200:
+        print(f"请求失败，状态码：{response.status_code}")
+        return []
 
-        if response.status_code != 200:
-            print(f"请求失败，状态码：{response.status_code}")
-            break
+    # 解析新闻标题（只解析<a>标签）
+    return select_text(response.text, 'a[aria-label].news-title-font_1xS-F', only='a', strip=True)
 
-        soup = BeautifulSoup(response.text, 'html.parser')
 
-        # 解析新闻标题
-        titles = soup.find_all('a', attrs={'aria-label': True, 'class': 'news-title-font_1xS-F'})
-        for title in titles:
-            news_titles.append(title.get_text(strip=True))
+def fetch_baidu_news(keyword, num_pages=10):
+    news_titles = []
 
-        # 添加随机延时
-        time.sleep(random.uniform(1, 3))
+    # 各页的 URL 事先已知，多页同时请求；按页码顺序合并标题，遇到空页（或请求失败）即停止
+    for titles in fetch_pages(lambda page: fetch_baidu_page(keyword, page), range(num_pages)):
+        news_titles.extend(titles)
 
     return news_titles
 
@@ -50,13 +49,8 @@ def save_to_file(titles, filename="output.txt"):
 
 
 def translate_text(text, src='en', dest='zh-cn'):
-    translator = Translator(service_urls=['translate.google.com'])
-    try:
-        translated_text = translator.translate(text, src=src, dest=dest).text
-    except Exception as e:
-        print(f"翻译失败：{text}，错误：{e}")
-        translated_text = text  # 保持原样
-    return translated_text
+    # 经过共享的翻译阶段：按句缓存、分块并发翻译，失败的句子保持原样
+    return get_translation_stage().translate_text(text, src=src, dest=dest)
 
 
 def extract_top_words(text, top_n=20):
@@ -67,7 +61,7 @@ def extract_top_words(text, top_n=20):
     words = cleaned_text.lower().split()
 
     # 统计词频
-    word_counts = Counter(words)
+    word_counts = WordCounter(words)
 
     # 获取出现次数最多的前N个词语
     most_common_words = word_counts.most_common(top_n)
@@ -75,7 +69,7 @@ def extract_top_words(text, top_n=20):
     return dict(most_common_words)
 
 
-def process_keyword(keyword, num_pages=10):
+def process_keyword(keyword, num_pages=10, stop=None):
     # 将英文关键词翻译成中文
     translated_keyword = translate_text(keyword, src='en', dest='zh-cn')
 
@@ -84,23 +78,21 @@ def process_keyword(keyword, num_pages=10):
 
     # 保存新闻标题到文件
     save_to_file(titles)
+    # 已超时（stop 被设置）时不再翻译
+    check_stop(stop)
 
-    # 从文件中读取内容
-    content = read_from_file()
-
-    # 翻译内容
-    translated_content = translate_text(content, src='zh-cn', dest='en')
+    # 逐条翻译标题：已翻译过的标题直接取缓存，其余分块并发翻译
+    stage = get_translation_stage()
+    translated_content = "\n".join(stage.translate_many(titles, src='zh-cn', dest='en'))
+    print(stage.report())
 
     # 提取出现次数最多的前20个英文单词
     top_words = extract_top_words(translated_content, top_n=20)
 
-    filename = f"{keyword}_Baidu_word_counts.json"
-
-    # 保存结果到JSON文件
-    with open(filename, "w", encoding="utf-8") as file:
-        json.dump(top_words, file, ensure_ascii=False, indent=4)
+    # 保存结果到词频存储
+    get_word_store().save(keyword, "baidu", top_words)
 
-    print(f"运行完毕，结果已保存到 {filename} 文件中。")
+    print(f"运行完毕，结果已保存到 {keyword}/baidu。")
 
 
 def read_from_file(filename="output.txt"):
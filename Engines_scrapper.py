@@ -1,20 +1,53 @@
 import requests
-from bs4 import BeautifulSoup
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from collections import Counter
 import json
 import re
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import time
 
-# 确保nltk的停用词被下载（如果没下载过）
-import nltk
-nltk.download("punkt")
-nltk.download("stopwords")
+from concurrent_fetch import fetch_all
+from http_cache import cached_get
+from html_parsing import link_hrefs, paragraph_text, select_attr
+from pagination import fetch_pages
+from pipeline import Checkpoint, is_stopped
+from url_index import canonical_url, near_duplicate_index, release_link, unique_links
+from near_duplicates import is_near_duplicate
+from word_store import get_word_store
+from word_counter import count_summary, new_counter
+from text_tokens import compile_filter
+from nltk_resources import ensure_nltk_data
 
-def get_search_links(query, engine="yahoo", max_pages=3):
+
+def fetch_search_page(engine, base_url, page):
+    """
+    抓取一页搜索结果，返回其中指向外部文章的链接。
+    """
+    if engine == "google":
+        url = base_url + str(page * 10)
+    elif engine == "yahoo":
+        url = base_url + str(page * 7 + 1)
+
+    response = cached_get(url)
+
+    if engine == "google":
+        hrefs = select_attr(response.text, "a[href][jsname='UWckNb']", "href", only="a")
+        excluded = "translate.google.com/translate"
+    elif engine == "yahoo":
+        hrefs = link_hrefs(response.text)
+        excluded = ".search.yahoo.com"
+
+    links = []
+    for href in hrefs:
+        # 先展开 /url?q= 等重定向包装并去掉追踪参数，再排除搜索引擎自身的链接
+        url = canonical_url(href)
+        if url and excluded not in url:
+            links.append(url)
+    return links
+
+def iter_search_links(query, engine="yahoo", max_pages=3, stop=None):
+    """
+    抓取搜索结果并逐个产出链接，最多 10*max_pages 个；
+    作为流水线的生产者，下游可以在后续页面抓取期间就开始处理已产出的链接。
+    多个结果页同时请求，链接仍按页码顺序产出，遇到没有链接的页面或 stop 被设置时停止翻页。
+    """
     if engine == "google":
         base_url = f"https://www.google.com/search?q={query}&start="
     elif engine == "yahoo":
@@ -22,81 +55,67 @@ def get_search_links(query, engine="yahoo", max_pages=3):
     else:
         raise ValueError("不支持的搜索引擎")
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
-    urls = []
-    for page in range(max_pages):
-        if engine == "google":
-            url = base_url + str(page * 10)
-        elif engine == "yahoo":
-            url = base_url + str(page * 7 + 1)
-
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        if engine == "google":
-            for link in soup.find_all("a", href=True, jsname="UWckNb"):
-                href = link.get("href")
-                if href and ("/url?q=" in href or href.startswith("http")) and "translate.google.com/translate" not in href:
-                    if "/url?q=" in href:
-                        href = href.split("/url?q=")[1].split("&")[0]
-                    urls.append(href)
-        elif engine == "yahoo":
-            for link in soup.find_all("a", href=True):
-                href = link.get("href")
-                if href and ("/url?q=" in href or href.startswith("http")) and ".search.yahoo.com" not in href:
-                    if "/url?q=" in href:
-                        href = href.split("/url?q=")[1].split("&")[0]
-                    urls.append(href)
-
-        time.sleep(1)  # 增加请求间隔，避免被封IP
-
-    print(f"{engine} URL count:", len(urls))
-    return urls[:10*max_pages]
+    limit = 10 * max_pages
+    count = 0
+    pages = fetch_pages(lambda page: fetch_search_page(engine, base_url, page), range(max_pages))
+    for links in pages:
+        for href in links[:limit - count]:
+            yield href
+            count += 1
+        if count >= limit or is_stopped(stop):
+            pages.close()
+            break
+
+    print(f"{engine} URL count:", count)
+
+def get_search_links(query, engine="yahoo", max_pages=3):
+    return list(iter_search_links(query, engine, max_pages))
 
 def fetch_article_text(url):
     try:
-        response = requests.get(url, headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
+        response = cached_get(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        text = " ".join([p.get_text() for p in soup.find_all("p")])
+        text = paragraph_text(response.text)
         english_text = re.sub(r"[^a-zA-Z\s]", "", text)
         return english_text
     except requests.RequestException as e:
         print(f"Request failed: {url} Error: {e}")
         return ""
 
-def count_words_in_articles(urls):
+def count_words_in_articles(urls, on_update=None, max_workers=None, duplicates=None):
     """
     统计一组文章中每个单词的出现次数，排除停用词。
 
     参数:
-    urls (list of str): 文章的URL列表。
+    urls (iterable of str): 文章的URL列表，也可以是边发现边产出链接的生成器。
+    on_update (callable): 每统计完一篇文章后以当前计数调用，例如 Checkpoint.update。
+    max_workers (int): 抓取并发数，默认取 config.FETCH_MAX_WORKERS。
+    duplicates (NearDuplicateIndex): 近似重复索引，转载和镜像页面不再计数；为空时不检查。
 
     返回:
-    Counter: 包含每个单词及其出现次数的Counter对象。
+    WordCounter 或 ApproxCounter: 包含每个单词及其出现次数的计数器（由 config.COUNTER_MODE 决定）。
     """
-    all_words = Counter()
+    all_words = new_counter()
+    ensure_nltk_data("stopwords")
     stop_words = set(stopwords.words("english"))
+    filter_words = compile_filter(stop_words)
 
-    for url in urls:
+    # 并发抓取，同一主机的并发数受 config.FETCH_PER_HOST_LIMIT 限制，请求速率由 rate_limit 按主机控制
+    for url, article_text in fetch_all(urls, fetch_article_text, max_workers=max_workers):
         print(f"Processing: {url}")
-        article_text = fetch_article_text(url)
-        if article_text:
-            words = word_tokenize(article_text.lower())
-            filtered_words = [word for word in words if word.isalpha() and word not in stop_words]
-            all_words.update(filtered_words)
-            time.sleep(1)  # 增加请求间隔，避免被封IP
+        if not article_text:
+            # 抓取失败：放弃认领，其他发现该文档的来源可以补抓
+            release_link(urls, url)
+        elif not is_near_duplicate(duplicates, url, article_text):
+            all_words.update(filter_words(article_text))
+            if on_update:
+                on_update(all_words)
 
     return all_words
 
 def save_to_json(word_counts, filename="engine_word_counts.json"):
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(word_counts, f, indent=4)
+        json.dump(dict(word_counts), f, indent=4)
     print(f"Results saved to {filename}")
 
 def plot_word_frequency(word_counts, title):
@@ -104,10 +123,13 @@ def plot_word_frequency(word_counts, title):
     生成词频统计的柱状图。
 
     参数:
-    word_counts (Counter): 词频统计的Counter对象。
+    word_counts (WordCounter): 词频统计的计数器。
     title (str): 图表标题。
     """
     if word_counts:
+        # 绘图库只在需要画图时导入，爬取时不承担其导入开销
+        import matplotlib.pyplot as plt
+
         words, counts = zip(*word_counts.most_common(20))
         plt.figure(figsize=(12, 6))
         plt.bar(words, counts, color='blue')
@@ -125,10 +147,13 @@ def generate_word_cloud(word_counts, title):
     生成词云。
 
     参数:
-    word_counts (Counter): 词频统计的Counter对象。
+    word_counts (WordCounter): 词频统计的计数器。
     title (str): 词云标题。
     """
     if word_counts:
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+
         wordcloud = WordCloud(width=800, height=800, background_color='white', min_font_size=10).generate_from_frequencies(word_counts)
         plt.figure(figsize=(8, 8), facecolor=None)
         plt.imshow(wordcloud)
@@ -139,18 +164,23 @@ def generate_word_cloud(word_counts, title):
     else:
         print(f"Not enough data to generate {title} word cloud")
 
-def yahoo_crawl(query):
+def yahoo_crawl(query, max_pages=None, max_workers=None, stop=None):
     print("yahoo_crawl:")
-    max_pages = int(input("Please enter the number of pages to crawl: "))
+    if max_pages is None:
+        max_pages = int(input("Please enter the number of pages to crawl: "))
 
     engines = ["yahoo"]
     all_word_counts = {}
+    store = get_word_store()
 
     for engine in engines:
-        urls = get_search_links(query, engine, max_pages=max_pages)  # 使用用户输入的页数
-        word_counts = count_words_in_articles(urls)
+        # 链接边发现边抓取统计，并定期把中间结果写入词频存储；同一运行中其他来源已抓取的文档跳过
+        urls = unique_links(iter_search_links(query, engine, max_pages, stop), query, engine)  # 使用用户输入的页数
+        checkpoint = Checkpoint(lambda counts: store.save(query, engine, counts), stop=stop)
+        word_counts = count_words_in_articles(urls, checkpoint.update, max_workers, near_duplicate_index(query))
         all_word_counts[engine] = word_counts
-        save_to_json(word_counts, f"{query}_{engine}_word_counts.json")
+        store.save(query, engine, word_counts)
+        print(f"{engine} results saved, {count_summary(word_counts)}")
 
 def main():
     # 获取用户输入的搜索词汇和爬取页数
@@ -1,16 +1,22 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from collections import Counter
-import time
+from contextlib import nullcontext
 import json
-import nltk
 import re
 
+from browser_factory import init_browser
+from html_parsing import link_hrefs, paragraph_text, select_text
+from page_wait import load_page, click_and_wait
+from pos_tagging import tag_articles
+from pipeline import Checkpoint, is_stopped
+from browser_pool import BrowserPool
+from word_store import get_word_store
+from word_counter import count_summary, new_counter
+from text_tokens import tokenize
+from url_index import near_duplicate_index, unique_links
+from nltk_resources import ensure_nltk_data
+
 # 确保 nltk 的停用词被下载（如果没下载过）
 # nltk.download("punkt")
 # nltk.download("stopwords")
@@ -18,40 +24,27 @@ import re
 # nltk.download('averaged_perceptron_tagger_eng')
 
 
-# 配置 Chrome Driver
-def init_browser():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 无头模式（不显示浏览器窗口）
-    chrome_options.add_argument("--disable-gpu")  # 禁用 GPU 加速
-    chrome_options.add_argument("--no-sandbox")  # 禁用沙盒模式
-    chrome_options.add_argument("--disable-dev-shm-usage")  # 禁用 /dev/shm 使用
-    service = Service("D:\Anaconda/chromedriver.exe")  # 替换为你的 ChromeDriver 路径
-    browser = webdriver.Chrome(service=service, options=chrome_options)
-    return browser
-
 def remove_chinese(text):
     """
     移除文本中的中文字符。
     """
     return re.sub(r'[\u4e00-\u9fff]+', '', text)
 
-def get_nature_links(query, browser, link_count=10):
+def iter_nature_links(query, browser, link_count=10, stop=None):
     """
-    从 nature 搜索页面获取文章链接。
+    从 nature 搜索页面逐个产出文章链接，作为流水线的生产者边翻页边产出；stop 被设置后停止翻页。
     """
     search_url = f"https://www.nature.com/search?q={query}&order=relevance"
-    browser.get(search_url)
-    time.sleep(5)  # 等待页面加载
+    load_page(browser, search_url, "nature_search")  # 等待搜索结果出现
 
     links = []
-    while len(links) < link_count:
-        soup = BeautifulSoup(browser.page_source, "html.parser")
-
-        # 提取符合条件的链接
-        for link in soup.find_all("a", href=True):
-            if "articles" in link["href"]:
-                full_link = f"https://www.nature.com{link['href']}"
+    while len(links) < link_count and not is_stopped(stop):
+        # 提取符合条件的链接（只解析<a>标签）
+        for href in link_hrefs(browser.page_source):
+            if "articles" in href:
+                full_link = f"https://www.nature.com{href}"
                 links.append(full_link)
+                yield full_link
 
                 if len(links) >= link_count:
                     break
@@ -63,33 +56,36 @@ def get_nature_links(query, browser, link_count=10):
         # 查找并点击“下一页”按钮
         try:
             next_button = browser.find_element(By.CSS_SELECTOR, "a.c-pagination__link span")
-            next_button.click()  # 点击下一页
-            time.sleep(3)  # 等待页面加载
+            click_and_wait(browser, next_button, "nature_search")  # 点击下一页并等待新结果
         except Exception as e:
             print(f"没有找到下一页按钮或翻页出错，停止翻页：{e}")
             break
 
     print(f"提取到的有效链接: {links}")
-    return links
 
 
-def get_bbc_links(query, browser, link_count=10):
+def get_nature_links(query, browser, link_count=10):
     """
-    从 BBC 搜索页面获取指定数量的文章链接，仅包含 /news/articles，支持翻页。
+    从 nature 搜索页面获取文章链接。
+    """
+    return list(iter_nature_links(query, browser, link_count))
+
+
+def iter_bbc_links(query, browser, link_count=10, stop=None):
+    """
+    从 BBC 搜索页面逐个产出指定数量的文章链接，仅包含 /news/articles，支持翻页；stop 被设置后停止翻页。
     """
     base_url = f"https://www.bbc.com/search?q={query}"
-    browser.get(base_url)
-    time.sleep(5)  # 等待页面加载
+    load_page(browser, base_url, "bbc_search")  # 等待搜索结果出现
 
     links = []
-    while len(links) < link_count:
-        soup = BeautifulSoup(browser.page_source, "html.parser")
-
-        # 提取符合条件的链接
-        for link in soup.find_all("a", href=True):
-            if "news/articles" in link["href"]:
-                full_link = f"https://www.bbc.com{link['href']}"
+    while len(links) < link_count and not is_stopped(stop):
+        # 提取符合条件的链接（只解析<a>标签）
+        for href in link_hrefs(browser.page_source):
+            if "news/articles" in href:
+                full_link = f"https://www.bbc.com{href}"
                 links.append(full_link)
+                yield full_link
 
                 if len(links) >= link_count:
                     break
@@ -101,24 +97,26 @@ def get_bbc_links(query, browser, link_count=10):
         # 查找并点击“下一页”按钮
         try:
             next_button = browser.find_element(By.CSS_SELECTOR, "button[data-testid='pagination-next-button']")
-            next_button.click()  # 点击下一页按钮
-            time.sleep(5)  # 等待页面加载
+            click_and_wait(browser, next_button, "bbc_search")  # 点击下一页按钮并等待新结果
         except Exception as e:
             print(f"没有找到下一页按钮，停止爬取：{e}")
             break
 
     print(f"提取到的有效链接: {links}")
-    return links
+
+def get_bbc_links(query, browser, link_count=10):
+    """
+    从 BBC 搜索页面获取指定数量的文章链接，仅包含 /news/articles，支持翻页。
+    """
+    return list(iter_bbc_links(query, browser, link_count))
 
 def fetch_article_text(url, browser):
     """
     使用 Selenium 获取动态生成的网页内容，并提取文章文本。
     """
     try:
-        browser.get(url)
-        time.sleep(5)  # 等待页面加载
-        soup = BeautifulSoup(browser.page_source, "html.parser")
-        text = " ".join([p.get_text() for p in soup.find_all("p")])
+        load_page(browser, url, "article")  # 等待正文段落出现且文档加载完成
+        text = paragraph_text(browser.page_source)
         english_text = re.sub(r"[^a-zA-Z\s]", "", text)
         return english_text
     except Exception as e:
@@ -130,20 +128,12 @@ def fetch_article_text_nature(url, browser):
     使用 Selenium 获取动态生成的网页内容，并提取文章标题和摘要。
     """
     try:
-        # 访问文章页面
-        browser.get(url)
-        time.sleep(5)  # 等待页面加载
-
-        # 解析页面内容
-        soup = BeautifulSoup(browser.page_source, "html.parser")
+        # 访问文章页面，等待标题或摘要出现
+        load_page(browser, url, "nature_article")
 
-        # 提取标题
-        title_element = soup.find("h1", class_="c-article-title", attrs={"data-test": "article-title"})
-        title = title_element.get_text(strip=True) if title_element else "标题未找到"
-
-        # 提取摘要
-        abstract_element = soup.find("div", class_="c-article-section__content", id="Abs1-content")
-        abstract = abstract_element.get_text(strip=True) if abstract_element else "摘要未找到"
+        # 提取摘要（只解析<div>标签）
+        abstracts = select_text(browser.page_source, "div.c-article-section__content#Abs1-content", only="div", strip=True)
+        abstract = abstracts[0] if abstracts else "摘要未找到"
 
         return abstract  # 只返回摘要文本
 
@@ -152,11 +142,13 @@ def fetch_article_text_nature(url, browser):
         return "摘要未找到"  # 如果出错，返回一个默认的摘要
 
 
-def count_words_in_articles(urls, browser):
+def count_words_in_articles(urls, pool, on_update=None, duplicates=None):
     """
     统计一组文章中每个单词的出现次数，排除停用词。
+    文章由浏览器池并行渲染，每渲染完成一篇就立即统计；与 duplicates 中已有文章近似重复的文章跳过。
     """
-    all_words = Counter()
+    all_words = new_counter()
+    ensure_nltk_data("stopwords")
     stop_words = set(stopwords.words("english"))
 
     domain_specific_stopwords = {"google", "scholar", "nature", "www", "https", "com", "article", "bbc", "office", "said"}
@@ -164,14 +156,7 @@ def count_words_in_articles(urls, browser):
     # 定义名词、动词和形容词的词性标签
     allowed_pos = {"NN", "NNS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ", "JJ", "JJR", "JJS"}
 
-    for url in urls:
-        print(f"正在处理: {url}")
-        article_text = fetch_article_text(url, browser)
-        words = word_tokenize(article_text.lower())
-
-        # 词性标注
-        tagged_words = nltk.pos_tag(words)
-
+    def count_tagged(tagged_words):
         # 过滤停用词、领域停用词以及非名词/动词
         filtered_words = [
             word for word, pos in tagged_words
@@ -179,13 +164,19 @@ def count_words_in_articles(urls, browser):
         ]
 
         all_words.update(filtered_words)
+        if on_update:
+            on_update(all_words)
+
+    tag_articles(pool.map(fetch_article_text, urls), tokenize, count_tagged, duplicates, urls)
     return all_words
 
-def count_words_in_articles_nature(urls, browser):
+def count_words_in_articles_nature(urls, pool, on_update=None, duplicates=None):
     """
     统计一组文章中每个单词的出现次数，排除停用词。
+    文章由浏览器池并行渲染，每渲染完成一篇就立即统计；与 duplicates 中已有文章近似重复的文章跳过。
     """
-    all_words = Counter()
+    all_words = new_counter()
+    ensure_nltk_data("stopwords", "punkt_tab")
     stop_words = set(stopwords.words("english"))
 
     domain_specific_stopwords = {"google", "scholar", "nature", "www", "https", "com", "article" }
@@ -193,14 +184,7 @@ def count_words_in_articles_nature(urls, browser):
      # 定义名词、动词和形容词的词性标签
     allowed_pos = {"NN", "NNS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ", "JJ", "JJR", "JJS"}
 
-    for url in urls:
-        print(f"正在处理: {url}")
-        article_text = fetch_article_text_nature(url, browser)
-        words = word_tokenize(article_text.lower())
-
-        # 词性标注
-        tagged_words = nltk.pos_tag(words)
-
+    def count_tagged(tagged_words):
         # 过滤停用词、领域停用词以及非名词/动词
         filtered_words = [
             word for word, pos in tagged_words
@@ -208,6 +192,13 @@ def count_words_in_articles_nature(urls, browser):
         ]
 
         all_words.update(filtered_words)
+        if on_update:
+            on_update(all_words)
+
+    # 摘要未经清洗、含有标点，仍用 word_tokenize 分词
+    tag_articles(
+        pool.map(fetch_article_text_nature, urls), lambda text: word_tokenize(text.lower()), count_tagged, duplicates, urls
+    )
     return all_words
 
 def save_to_json(word_counts, filename):
@@ -222,26 +213,36 @@ def save_to_json(word_counts, filename):
         json.dump(filtered_word_counts, f, indent=4)
     print(f"结果已保存到 {filename}")
 
-def selenium_crawl(query, source="nature", link_count=10):
+def save_to_store(word_counts, query, source):
+    """
+    移除中文后将统计结果写入词频存储。
+    """
+    get_word_store().save(query, source, {remove_chinese(key): value for key, value in word_counts.items()})
+    print(f"结果已保存到 {query}/{source}，{count_summary(word_counts)}")
+
+def selenium_crawl(query, source="nature", link_count=10, pool_size=None, pool=None, stop=None):
     """
     主爬取函数，调用 Selenium 浏览器并获取指定平台的文章链接。
+    pool_size 为渲染文章的浏览器数量，默认取 config.BROWSER_POOL_SIZE；
+    传入 pool 时使用多个任务共用的浏览器池，由调用方负责关闭；stop 被设置后停止翻页和计数。
     """
+    if source == "nature":
+        iter_links, count_words = iter_nature_links, count_words_in_articles_nature
+    elif source == "bbc":
+        iter_links, count_words = iter_bbc_links, count_words_in_articles
+    else:
+        raise ValueError("Unsupported source. Please choose 'nature' or 'bbc'.")
+
+    checkpoint = Checkpoint(lambda counts: save_to_store(counts, query, source), stop=stop)
+
+    # 链接发现使用单独的浏览器，在后台边翻页边产出链接，浏览器池同时渲染已发现的文章
     browser = init_browser()
     try:
-        if source == "nature":
-            urls = get_nature_links(query, browser, link_count)
-        elif source == "bbc":
-            urls = get_bbc_links(query, browser, link_count)
-        else:
-            raise ValueError("Unsupported source. Please choose 'nature' or 'bbc'.")
-
-        print(f"从 {source} 获取的链接数量: {len(urls)}")
-        if source == "nature":
-            word_counts = count_words_in_articles_nature(urls, browser)
-            save_to_json(word_counts, filename=f"{query}_{source}_word_counts.json")
-        elif source == "bbc":
-            word_counts = count_words_in_articles(urls, browser)
-            save_to_json(word_counts, filename=f"{query}_{source}_word_counts.json")
+        with nullcontext(pool) if pool else BrowserPool(init_browser, size=pool_size) as pool:  # 退出时确保关闭自建的浏览器
+            # 同一运行中其他来源已经抓取的文档不再抓取
+            urls = unique_links(iter_links(query, browser, link_count, stop), query, source)
+            word_counts = count_words(urls, pool, checkpoint.update, near_duplicate_index(query))
+            save_to_store(word_counts, query, source)
     finally:
         browser.quit()  # 确保关闭浏览器
 
@@ -0,0 +1,291 @@
+from collections import Counter
+from collections.abc import Mapping
+import hashlib
+import heapq
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+import config
+
+
+def _hashes(words):
+    # 每个单词取一个 64 位哈希并拆成两个 32 位值，用于双重哈希；与进程无关，不同进程的草图可以合并
+    digests = b"".join(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest() for word in words)
+    values = np.frombuffer(digests, dtype="<u8")
+    return values & 0xFFFFFFFF, values >> np.uint64(32)
+
+
+class CountMinSketch:
+    """
+    Count-Min 草图：用 depth 行、每行 width 个计数器估计任意单词的次数。
+
+    估计值不会小于真实次数；以 1 - delta 的概率不超过真实次数 + epsilon * N，
+    其中 epsilon = e / width，delta = e^-depth，N 为累计的总次数。内存与语料大小无关。
+    """
+
+    def __init__(self, width=None, depth=None):
+        self.width = width or config.APPROX_WIDTH
+        self.depth = depth or config.APPROX_DEPTH
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, words):
+        h1, h2 = _hashes(words)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.intp)
+
+    def add_many(self, words, counts):
+        """
+        累加一组不同单词各自的次数。
+        """
+        columns = self._columns(words)
+        counts = np.asarray(counts, dtype=np.int64)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts)
+        self.total += int(counts.sum())
+
+    def estimate_many(self, words):
+        """
+        返回一组单词的估计次数（各行计数器的最小值）。
+        """
+        if not words:
+            return []
+        columns = self._columns(words)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0).tolist()
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    def merge(self, other):
+        """
+        合并另一个相同尺寸的草图（例如另一个工作进程的统计）。
+        """
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches must have the same width and depth to merge.")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频词结构：最多跟踪 k 个单词。
+
+    新单词到来而结构已满时，替换当前次数最少的单词，并把被替换者的次数记为新单词的误差；
+    每个被跟踪单词的次数都不小于真实次数，且超出部分不超过它的误差（≤ N / k）。
+    """
+
+    def __init__(self, k=None):
+        self.k = k or config.APPROX_TOP_K
+        self.counts = {}
+        self.errors = {}
+        # (次数, 单词) 最小堆；次数变化时压入新条目，旧条目在弹出时跳过
+        self._heap = []
+
+    def _push(self, word):
+        heapq.heappush(self._heap, (self.counts[word], word))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(count, word) for word, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, word = heapq.heappop(self._heap)
+            if self.counts.get(word) == count:
+                del self.counts[word]
+                return count, self.errors.pop(word)
+
+    def min_count(self):
+        """
+        结构已满时返回被跟踪单词的最小次数，否则返回 0（未被跟踪的单词的次数上限）。
+        """
+        if len(self.counts) < self.k:
+            return 0
+        while True:
+            count, word = self._heap[0]
+            if self.counts.get(word) == count:
+                return count
+            heapq.heappop(self._heap)
+
+    def add(self, word, count):
+        if word in self.counts:
+            self.counts[word] += count
+        elif len(self.counts) < self.k:
+            self.counts[word] = count
+            self.errors[word] = 0
+        else:
+            floor, _ = self._pop_min()
+            self.counts[word] = floor + count
+            self.errors[word] = floor
+        self._push(word)
+
+    def merge(self, other):
+        """
+        合并另一个结构：不在某一方中的单词按该方的最小次数补足（计入误差），再保留次数最多的 k 个。
+        """
+        floor_self, floor_other = self.min_count(), other.min_count()
+        counts, errors = {}, {}
+        for word in self.counts.keys() | other.counts.keys():
+            count_self = self.counts.get(word, floor_self)
+            count_other = other.counts.get(word, floor_other)
+            counts[word] = count_self + count_other
+            errors[word] = self.errors.get(word, floor_self) + other.errors.get(word, floor_other)
+        kept = heapq.nlargest(self.k, counts, key=counts.get)
+        self.counts = {word: counts[word] for word in kept}
+        self.errors = {word: errors[word] for word in kept}
+        self._heap = [(count, word) for word, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+
+class ApproxCounter(Mapping):
+    """
+    内存固定的近似单词计数器：Count-Min 草图估计任意单词的次数，Space-Saving 保留前 k 个高频词。
+
+    用法与 Counter 的常用部分相同（update、most_common、按单词取值、items），
+    items() 和迭代只包含被跟踪的前 k 个单词；可以与其他工作进程的计数器合并。
+    """
+
+    def __init__(self, words=None, width=None, depth=None, k=None):
+        self.sketch = CountMinSketch(width, depth)
+        self.top = SpaceSaving(k)
+        if words is not None:
+            self.update(words)
+
+    def update(self, words):
+        """
+        累加一组单词（可以重复）的出现次数。
+        """
+        distinct = Counter(words)
+        if not distinct:
+            return
+        self.sketch.add_many(list(distinct), list(distinct.values()))
+        for word, count in distinct.items():
+            self.top.add(word, count)
+
+    def _estimates(self, words):
+        # Space-Saving 与 Count-Min 都只会高估，取两者中较小的一个
+        return {
+            word: min(self.top.counts.get(word, estimate), estimate)
+            for word, estimate in zip(words, self.sketch.estimate_many(words))
+        }
+
+    def __getitem__(self, word):
+        return self._estimates([word])[word]
+
+    def __contains__(self, word):
+        return self[word] > 0
+
+    def __iter__(self):
+        return iter(list(self.top.counts))
+
+    def __len__(self):
+        return len(self.top.counts)
+
+    def to_dict(self):
+        """
+        返回被跟踪的前 k 个单词的估计次数。
+        """
+        return self._estimates(list(self.top.counts))
+
+    def items(self):
+        return self.to_dict().items()
+
+    def most_common(self, n=None):
+        """
+        返回估计次数最多的 n 个 (单词, 次数)，n 不应超过 k。
+        """
+        estimates = self.to_dict()
+        words = heapq.nlargest(n or len(estimates), estimates, key=estimates.get)
+        return [(word, estimates[word]) for word in words]
+
+    def bounds(self, word):
+        """
+        返回单词真实次数的 (下限, 上限)：被跟踪的单词下限为其次数减去误差，其余为 0。
+        """
+        upper = self[word]
+        lower = self.top.counts[word] - self.top.errors[word] if word in self.top.counts else 0
+        return max(0, min(lower, upper)), upper
+
+    def error_bounds(self):
+        """
+        报告当前的误差范围。
+
+        返回:
+        dict: total 为累计单词数；sketch_error 为 Count-Min 估计的最大高估量（epsilon * N），
+              以 sketch_confidence 的概率成立；top_k_error 为 Space-Saving 的最大高估量（N / k）。
+        """
+        total = self.sketch.total
+        return {
+            "total": total,
+            "sketch_error": self.sketch.epsilon * total,
+            "sketch_confidence": 1 - self.sketch.delta,
+            "top_k_error": total / self.top.k,
+        }
+
+    def merge(self, other):
+        """
+        合并另一个参数相同的计数器（例如另一个工作进程的统计），返回自身。
+        """
+        self.sketch.merge(other.sketch)
+        self.top.merge(other.top)
+        return self
+
+
+def merge(counters):
+    """
+    把多个 ApproxCounter 合并为一个新的计数器。
+    """
+    counters = list(counters)
+    first = counters[0]
+    merged = ApproxCounter(width=first.sketch.width, depth=first.sketch.depth, k=first.top.k)
+    for counter in counters:
+        merged.merge(counter)
+    return merged
+
+
+def main():
+    """
+    在模拟的 Zipf 分布语料上比较近似计数与精确计数的前 200 个单词。
+
+    用法: python approx_counter.py [文章数] [每篇单词数] [词表大小]
+    """
+    articles = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    words_per_article = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    vocab_size = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+
+    rng = random.Random(0)
+    vocab = [f"word{i}" for i in range(vocab_size)]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+
+    exact = Counter()
+    # 两个“工作进程”各统计一半文章，最后合并
+    workers = [ApproxCounter(), ApproxCounter()]
+    start = time.perf_counter()
+    for i in range(articles):
+        article = rng.choices(vocab, weights, k=words_per_article)
+        exact.update(article)
+        workers[i % 2].update(article)
+    approx = merge(workers)
+    elapsed = time.perf_counter() - start
+
+    top_exact = [word for word, _ in exact.most_common(200)]
+    top_approx = [word for word, _ in approx.most_common(200)]
+    worst = max(abs(approx[word] - exact[word]) for word in top_exact)
+    print(f"{articles * words_per_article} words, {len(exact)} distinct, {elapsed:.1f}s")
+    print(f"sketch {approx.sketch.table.nbytes / 1e6:.1f} MB, tracking {len(approx)} words")
+    print(f"top-200 overlap {len(set(top_exact) & set(top_approx))}/200, largest error {worst}")
+    print("error bounds:", approx.error_bounds())
+
+
+if __name__ == "__main__":
+    main()
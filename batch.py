@@ -0,0 +1,180 @@
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import json
+import sys
+import threading
+import time
+
+import config
+from browser_factory import init_browser
+from browser_pool import BrowserPool
+from dynamic import SOURCES, crawl_sources, merge_counts, run_source
+from http_cache import get_cache
+
+
+def read_jobs(path):
+    """
+    读取 JSONL 任务文件，每行一个任务，例如：
+    {"id": "ai-1", "query": "artificial intelligence", "sources": ["yahoo", "nature"], "link_count": 20, "max_pages": 3}
+    只有 query 是必需的；sources 默认取 config.SOURCES，link_count 和 max_pages 默认取各来源的配置。
+    id 默认由 query 和 sources 生成（不使用行号，编辑任务文件不会改变已完成任务的 id）。
+
+    返回:
+    list of dict: 任务列表；无法解析、缺少 query、含有不支持的来源或 id 重复的行会被跳过。
+    """
+    jobs = []
+    ids = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"第 {line_no} 行不是有效的 JSON，已跳过: {e}")
+                continue
+            if not isinstance(job, dict) or not job.get("query"):
+                print(f"第 {line_no} 行缺少 query，已跳过")
+                continue
+            job.setdefault("sources", list(config.SOURCES))
+            unknown = [source for source in job["sources"] if source not in SOURCES]
+            if unknown:
+                print(f"第 {line_no} 行含有不支持的来源 {', '.join(map(str, unknown))}，已跳过")
+                continue
+            job.setdefault("id", f"{job['query']}|{','.join(sorted(job['sources']))}")
+            if job["id"] in ids:
+                print(f"第 {line_no} 行的任务 id {job['id']} 重复，已跳过")
+                continue
+            ids.add(job["id"])
+            jobs.append(job)
+    return jobs
+
+
+def read_finished(path):
+    """
+    读取已有结果文件中成功完成的任务 id，重新运行时跳过这些任务；失败的任务（带 error 的记录）会重新运行。
+    """
+    finished = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if "error" not in record:
+                        finished.add(record["id"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return finished
+
+
+class SharedRuns:
+    """
+    跨任务共享的来源运行：同一查询在同一来源上只爬取一次（搜索页和文章都只抓取一次），
+    其余请求它的任务等待同一次运行并使用同一个结果文件。
+
+    同一 (来源, 查询) 被多个任务以不同参数请求时，使用其中最大的 link_count 和 max_pages。
+    """
+
+    def __init__(self, jobs, pool):
+        self.pool = pool
+        self._params = {}
+        for job in jobs:
+            for source in job["sources"]:
+                link_count, max_pages = self._params.get((source, job["query"]), (None, None))
+                self._params[(source, job["query"])] = (
+                    max(filter(None, (link_count, job.get("link_count"))), default=None),
+                    max(filter(None, (max_pages, job.get("max_pages"))), default=None),
+                )
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def run(self, source, query, stop=None):
+        # 共享的运行使用第一个请求它的任务的 stop
+        key = (source, query)
+        with self._lock:
+            future = self._runs.get(key)
+            owner = future is None
+            if owner:
+                future = self._runs[key] = Future()
+        if owner:
+            link_count, max_pages = self._params.get(key, (None, None))
+            try:
+                run_source(source, query, link_count, max_pages, self.pool, stop)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def run_job(job, shared, top_n=20):
+    """
+    运行一个任务并返回它的结果记录。
+    """
+    started = time.time()
+    status, written = crawl_sources(job["query"], job["sources"], shared.run)
+    merged = merge_counts(job["query"], *written)
+    return {
+        "id": job["id"],
+        "query": job["query"],
+        "status": status,
+        "merged_sources": written,
+        "top_words": dict(list(merged.items())[:top_n]),
+        "elapsed": round(time.time() - started, 1),
+    }
+
+
+def run_batch(jobs_file=None, results_file=None, max_jobs=None):
+    """
+    批量运行任务文件中的全部查询，所有任务共用一个浏览器池、HTTP 会话和 HTTP 缓存。
+
+    每完成一个任务就向结果文件追加一行记录，中途中断后重新运行会跳过已完成的任务。
+
+    参数:
+    jobs_file (str): 任务文件，默认取 config.BATCH_JOBS_FILE。
+    results_file (str): 结果文件，默认取 config.BATCH_RESULTS_FILE。
+    max_jobs (int): 同时运行的任务数，默认取 config.BATCH_MAX_JOBS。
+    """
+    jobs_file = jobs_file or config.BATCH_JOBS_FILE
+    results_file = results_file or config.BATCH_RESULTS_FILE
+    finished = read_finished(results_file)
+    jobs = [job for job in read_jobs(jobs_file) if job["id"] not in finished]
+    print(f"{len(jobs)} 个任务待运行，{len(finished)} 个已完成")
+
+    started = time.time()
+    # dedupe: 不同任务中出现的同一文章页面只渲染一次
+    with BrowserPool(init_browser, dedupe=True) as pool, \
+            ThreadPoolExecutor(max_workers=max_jobs or config.BATCH_MAX_JOBS) as executor, \
+            open(results_file, "a", encoding="utf-8") as out:
+        shared = SharedRuns(jobs, pool)
+        futures = {executor.submit(run_job, job, shared): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"任务 {job['id']} 失败: {e}")
+                record = {"id": job["id"], "query": job["query"], "error": str(e)}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    # 所有任务完成后在进程池中批量渲染词云
+    from word_cloud import render_many
+    list(render_many(dict.fromkeys(job["query"] for job in jobs)))
+
+    print(f"{len(jobs)} 个任务用时 {time.time() - started:.1f} 秒")
+    print(get_cache().report())
+
+
+def main():
+    """
+    用法: python batch.py [任务文件] [结果文件]
+    """
+    jobs_file = sys.argv[1] if len(sys.argv) > 1 else None
+    results_file = sys.argv[2] if len(sys.argv) > 2 else None
+    run_batch(jobs_file, results_file)
+
+
+if __name__ == "__main__":
+    main()
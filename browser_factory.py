@@ -0,0 +1,121 @@
+from selenium import webdriver
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+import config
+from page_archive import get_archive, is_replaying
+
+# 文本抓取用不到的资源：图片、音视频和字体
+_BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+# 常见的广告与统计域名
+_BLOCKED_TRACKERS = [
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*",
+    "*google-analytics.com*", "*adservice.google.*", "*amazon-adsystem.com*",
+    "*facebook.net*", "*scorecardresearch.com*", "*hotjar.com*", "*chartbeat.*",
+    "*taboola.com*", "*outbrain.com*", "*optimizely.com*", "*criteo.*",
+]
+
+
+def _base_options():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")  # 无头模式（不显示浏览器窗口）
+    chrome_options.add_argument("--disable-gpu")  # 禁用 GPU 加速
+    chrome_options.add_argument("--no-sandbox")  # 禁用沙盒模式
+    chrome_options.add_argument("--disable-dev-shm-usage")  # 禁用 /dev/shm 使用
+    return chrome_options
+
+
+def _text_options():
+    chrome_options = _base_options()
+    # DOMContentLoaded 后即返回，不等待图片等子资源；内容是否就绪由 page_wait 判断
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-component-update")
+    chrome_options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+    # 限制渲染进程数量和 V8 堆大小，降低每个实例的内存占用
+    chrome_options.add_argument("--renderer-process-limit=2")
+    chrome_options.add_argument("--js-flags=--max-old-space-size=256")
+    chrome_options.add_argument("--window-size=1280,800")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.geolocation": 2,
+    })
+    return chrome_options
+
+
+class ReplayBrowser:
+    """
+    回放存档时代替 Chrome 的浏览器：get 从页面存档读取页面源码，不启动浏览器也不访问网络。
+
+    只支持各爬虫用到的接口；页面上没有可以点击的元素，依赖点击的翻页在第一页后停止。
+    """
+
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.page_source = "<html></html>"
+
+    def get(self, url):
+        html = get_archive().replay_page(url)
+        if html is None:
+            print(f"{url} 不在页面存档中")
+            html = "<html></html>"
+        self.current_url = url
+        self.page_source = html
+
+    def find_element(self, by, value):
+        raise NoSuchElementException(f"回放模式下页面不可交互: {value}")
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        return None
+
+    def quit(self):
+        pass
+
+
+def init_browser(profile=None):
+    """
+    创建无头 Chrome 浏览器，各爬虫模块共用这一实现。
+
+    参数:
+    profile (str): "text" 为纯文本抓取配置，屏蔽图片、音视频和字体，可选屏蔽广告/统计域名，
+                   使用 eager 加载策略并限制内存；"full" 加载全部资源。默认取 config.BROWSER_PROFILE。
+
+    返回:
+    WebDriver: Chrome 浏览器实例；回放存档时（config.ARCHIVE_MODE 为 "replay"）返回 ReplayBrowser。
+    """
+    if is_replaying():
+        return ReplayBrowser()
+    profile = profile or config.BROWSER_PROFILE
+    if profile == "text":
+        chrome_options = _text_options()
+    elif profile == "full":
+        chrome_options = _base_options()
+    else:
+        raise ValueError(f"Unsupported browser profile '{profile}'. Please choose 'text' or 'full'.")
+
+    # ChromeDriver 路径来自配置；未配置时由 Selenium Manager 自动查找
+    service = Service(config.CHROMEDRIVER_PATH) if config.CHROMEDRIVER_PATH else Service()
+    browser = webdriver.Chrome(service=service, options=chrome_options)
+
+    if profile == "text":
+        # 通过 DevTools 协议在网络层直接拦截，字体等资源无法仅靠偏好设置关闭
+        blocked = list(_BLOCKED_RESOURCES)
+        if config.BROWSER_BLOCK_TRACKERS:
+            blocked += _BLOCKED_TRACKERS
+        browser.execute_cdp_cmd("Network.enable", {})
+        browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked})
+    return browser
@@ -0,0 +1,191 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+import config
+from concurrent_fetch import fetch_all
+
+
+class BrowserPool:
+    """
+    可复用的 WebDriver 实例池。
+
+    实例按需创建，最多 size 个；每次借出前做健康检查，崩溃或渲染次数达到
+    max_uses（防止 Chrome 内存泄漏累积）的实例会被关闭并重建。
+    dedupe 为真时 map() 记住最近 config.BROWSER_DEDUPE_ITEMS 个 (func, url) 的非空结果，
+    多个任务共用一个池时同一页面只渲染一次；渲染失败（空结果）不记住，之后的任务会重新渲染。
+    """
+
+    def __init__(self, factory, size=None, max_uses=None, dedupe=False):
+        """
+        参数:
+        factory (callable): 无参函数，返回一个新的 WebDriver，例如 init_browser。
+        size (int): 池中最多同时存在的浏览器数量，默认取 config.BROWSER_POOL_SIZE。
+        max_uses (int): 单个浏览器最多渲染的页面数，默认取 config.BROWSER_MAX_USES。
+        dedupe (bool): 是否在 map() 中对重复的页面只渲染一次。
+        """
+        self.factory = factory
+        self.size = size or config.BROWSER_POOL_SIZE
+        self.max_uses = max_uses or config.BROWSER_MAX_USES
+        self._idle = deque()
+        self._uses = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        # 空闲实例归还或实例被回收（腾出创建名额）时唤醒等待的线程
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+        self._dedupe = dedupe
+        # 已渲染完成的结果（LRU）和正在渲染的页面
+        self._rendered = OrderedDict()
+        self._rendering = {}
+
+    def _create(self):
+        browser = self.factory()
+        with self._lock:
+            self._uses[browser] = 0
+        return browser
+
+    def _discard(self, browser):
+        with self._available:
+            self._uses.pop(browser, None)
+            self._created -= 1
+            self._available.notify()
+        try:
+            browser.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(browser):
+        # chromedriver 进程退出后，请求抛出的是 urllib3 的连接错误而不是 WebDriverException
+        try:
+            browser.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        while True:
+            # 优先复用空闲实例；没有空闲实例且未达到 size 时创建新实例，否则等待归还或回收
+            with self._available:
+                while not self._idle and self._created >= self.size:
+                    self._available.wait()
+                browser = self._idle.popleft() if self._idle else None
+                if browser is None:
+                    self._created += 1
+
+            if browser is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._available:
+                        self._created -= 1
+                        self._available.notify()
+                    raise
+
+            if self._is_healthy(browser):
+                return browser
+            print("浏览器实例无响应，重新创建")
+            self._discard(browser)
+
+    def _release(self, browser, broken=False):
+        with self._lock:
+            self._uses[browser] = self._uses.get(browser, 0) + 1
+            worn_out = self._uses[browser] >= self.max_uses
+        if broken or worn_out or self._closed:
+            self._discard(browser)
+        else:
+            with self._available:
+                self._idle.append(browser)
+                self._available.notify()
+
+    @contextmanager
+    def browser(self):
+        """
+        借出一个浏览器实例，with 块结束后自动归还；块内抛出 WebDriverException，
+        或抛出其他异常且实例已无响应（例如 chromedriver 已退出）时回收该实例。
+        """
+        browser = self._acquire()
+        broken = False
+        try:
+            yield browser
+        except WebDriverException:
+            broken = True
+            raise
+        except Exception:
+            broken = not self._is_healthy(browser)
+            raise
+        finally:
+            self._release(browser, broken)
+
+    def _render(self, func, url):
+        with self.browser() as browser:
+            return func(url, browser)
+
+    def _run(self, func, url):
+        if not self._dedupe:
+            return self._render(func, url)
+
+        # 第一个请求该页面的任务负责渲染，同时到达的其他任务等待同一个结果
+        key = (func, url)
+        with self._lock:
+            if key in self._rendered:
+                self._rendered.move_to_end(key)
+                return self._rendered[key]
+            future = self._rendering.get(key)
+            owner = future is None
+            if owner:
+                future = self._rendering[key] = Future()
+        if owner:
+            try:
+                result = self._render(func, url)
+            except Exception as e:
+                with self._lock:
+                    del self._rendering[key]
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    del self._rendering[key]
+                    if result:
+                        self._rendered[key] = result
+                        while len(self._rendered) > config.BROWSER_DEDUPE_ITEMS:
+                            self._rendered.popitem(last=False)
+                future.set_result(result)
+        return future.result()
+
+    def map(self, func, urls):
+        """
+        将 URL 分发给池中的浏览器并行渲染，每完成一个就立即产出结果。
+
+        参数:
+        func (callable): 接收 (url, browser) 的函数，例如 fetch_article_text。
+        urls (iterable of str): 要渲染的 URL 列表或生成器，生成器会边产生边渲染。
+
+        返回:
+        generator: 按完成顺序产出 (url, result) 二元组，渲染失败时 result 为空字符串。
+        """
+        def run(url):
+            return self._run(func, url)
+
+        # 浏览器数量本身就是并发上限，不再额外按主机限制
+        for url, result in fetch_all(urls, run, max_workers=self.size, per_host_limit=self.size):
+            yield url, result if result is not None else ""
+
+    def close(self):
+        """
+        关闭池中所有空闲的浏览器；之后归还的实例也会直接关闭。
+        """
+        self._closed = True
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for browser in idle:
+            self._discard(browser)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
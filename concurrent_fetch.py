@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque, defaultdict
+import queue
+from urllib.parse import urlsplit
+
+import config
+from pipeline import DONE, get_item, start_producer
+
+# 等待新链接时的轮询间隔（秒）
+_POLL_INTERVAL = 0.1
+
+
+def get_host(url):
+    """
+    提取 URL 的主机名（小写），用于按主机限制并发。
+    """
+    return urlsplit(url).netloc.lower()
+
+
+def fetch_all(urls, fetch_func, max_workers=None, per_host_limit=None):
+    """
+    使用有界线程池并发抓取一组 URL，每完成一个就立即产出结果。
+
+    同一主机的请求不会超过 per_host_limit 个同时进行；等待中的 URL
+    不占用工作线程，因此一个慢主机不会挤占其他主机的并发额度。
+    urls 可以是生成器：链接在后台线程中逐个产生，边发现边抓取，
+    待抓取的链接积压过多时发现阶段会暂停。
+
+    参数:
+    urls (iterable of str): 要抓取的 URL 列表或生成器。
+    fetch_func (callable): 接收单个 URL 并返回结果的函数，例如 fetch_article_text。
+    max_workers (int): 全局最大并发数，默认取 config.FETCH_MAX_WORKERS。
+    per_host_limit (int): 单个主机的最大并发数，默认取 config.FETCH_PER_HOST_LIMIT。
+
+    返回:
+    generator: 按完成顺序产出 (url, result) 二元组。
+    """
+    max_workers = max_workers or config.FETCH_MAX_WORKERS
+    per_host_limit = per_host_limit or config.FETCH_PER_HOST_LIMIT
+    source = start_producer(urls, maxsize=config.PIPELINE_QUEUE_SIZE)
+
+    # 按主机分组排队，保持同一主机内的原始顺序
+    pending = defaultdict(deque)
+    buffered = 0
+    exhausted = False
+    in_flight = defaultdict(int)
+    futures = {}
+
+    def pull(block):
+        # 从链接队列中取出新链接；只有在没有任务可等时才阻塞等待
+        nonlocal buffered, exhausted
+        while not exhausted and buffered < max_workers + config.PIPELINE_QUEUE_SIZE:
+            try:
+                url = get_item(source, block=block, timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                return
+            if url is DONE:
+                exhausted = True
+                return
+            pending[get_host(url)].append(url)
+            buffered += 1
+            block = False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def schedule():
+            # 在全局和主机两个额度内尽可能多地提交任务
+            nonlocal buffered
+            for host in list(pending):
+                host_queue = pending[host]
+                while host_queue and in_flight[host] < per_host_limit and len(futures) < max_workers:
+                    url = host_queue.popleft()
+                    buffered -= 1
+                    futures[executor.submit(fetch_func, url)] = (url, host)
+                    in_flight[host] += 1
+                if not host_queue:
+                    del pending[host]
+                if len(futures) >= max_workers:
+                    return
+
+        while True:
+            pull(block=not futures)
+            schedule()
+            if not futures:
+                if exhausted and not pending:
+                    break
+                continue
+            # 链接仍在产生时定期醒来接收新链接
+            done, _ = wait(futures, timeout=None if exhausted else _POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, host = futures.pop(future)
+                in_flight[host] -= 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"抓取失败: {url} 错误: {e}")
+                    result = None
+                yield url, result
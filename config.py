@@ -0,0 +1,166 @@
+import os
+
+
+def _env_int(name, default):
+    """
+    从环境变量读取整数配置，未设置或无法解析时返回默认值。
+    """
+    value = os.environ.get(name)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    """
+    从环境变量读取浮点数配置，未设置或无法解析时返回默认值。
+    """
+    value = os.environ.get(name)
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+# 并发抓取：全局最多同时进行的请求数，以及同一主机最多同时进行的请求数
+FETCH_MAX_WORKERS = _env_int("SCRAPER_FETCH_MAX_WORKERS", 16)
+FETCH_PER_HOST_LIMIT = _env_int("SCRAPER_FETCH_PER_HOST_LIMIT", 2)
+
+# 单个 HTTP 请求的连接超时和读取超时（秒），避免一个慢主机拖住整个流程
+HTTP_CONNECT_TIMEOUT = _env_float("SCRAPER_HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_READ_TIMEOUT = _env_float("SCRAPER_HTTP_READ_TIMEOUT", 15.0)
+
+# 失败重试：总次数与指数退避因子（第 n 次重试前等待 backoff * 2^(n-1) 秒）
+HTTP_RETRIES = _env_int("SCRAPER_HTTP_RETRIES", 3)
+HTTP_BACKOFF_FACTOR = _env_float("SCRAPER_HTTP_BACKOFF_FACTOR", 0.5)
+
+# 按主机的令牌桶限速：初始、最高和最低速率（每秒请求数）与突发容量；
+# 收到 429/503 时速率乘以 BACKOFF 并遵守 Retry-After（最多暂停 MAX_PAUSE 秒），之后每次成功请求速率增加 STEP
+RATE_LIMIT_ENABLED = _env_int("SCRAPER_RATE_LIMIT_ENABLED", 1) == 1
+RATE_LIMIT_RPS = _env_float("SCRAPER_RATE_LIMIT_RPS", 2.0)
+RATE_LIMIT_MAX_RPS = _env_float("SCRAPER_RATE_LIMIT_MAX_RPS", 10.0)
+RATE_LIMIT_MIN_RPS = _env_float("SCRAPER_RATE_LIMIT_MIN_RPS", 0.1)
+RATE_LIMIT_BURST = _env_int("SCRAPER_RATE_LIMIT_BURST", 2)
+RATE_LIMIT_BACKOFF = _env_float("SCRAPER_RATE_LIMIT_BACKOFF", 0.5)
+RATE_LIMIT_STEP = _env_float("SCRAPER_RATE_LIMIT_STEP", 0.1)
+RATE_LIMIT_MAX_PAUSE = _env_float("SCRAPER_RATE_LIMIT_MAX_PAUSE", 300.0)
+
+# 所有基于 requests 的爬虫共用的 User-Agent
+USER_AGENT = os.environ.get(
+    "SCRAPER_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+)
+
+# 翻页抓取：同时请求的搜索结果页数，以及每页请求前的随机延时上限（秒，在按主机限速之外错开请求）
+PAGINATE_WORKERS = _env_int("SCRAPER_PAGINATE_WORKERS", 3)
+PAGINATE_JITTER = _env_float("SCRAPER_PAGINATE_JITTER", 0.5)
+
+# 磁盘 HTTP 缓存：目录、有效期（秒）和容量上限（字节），超出容量时按最近最少使用淘汰
+HTTP_CACHE_ENABLED = _env_int("SCRAPER_HTTP_CACHE_ENABLED", 1) == 1
+HTTP_CACHE_DIR = os.environ.get("SCRAPER_HTTP_CACHE_DIR", ".http_cache")
+HTTP_CACHE_TTL = _env_int("SCRAPER_HTTP_CACHE_TTL", 6 * 3600)
+HTTP_CACHE_MAX_BYTES = _env_int("SCRAPER_HTTP_CACHE_MAX_BYTES", 500 * 1024 * 1024)
+
+# Selenium 浏览器池：同时运行的无头 Chrome 数量，以及每个实例渲染多少个页面后回收重建
+BROWSER_POOL_SIZE = _env_int("SCRAPER_BROWSER_POOL_SIZE", 4)
+BROWSER_MAX_USES = _env_int("SCRAPER_BROWSER_MAX_USES", 50)
+# 多个任务共用浏览器池时最多记住多少个已渲染页面的结果（按最近最少使用淘汰）
+BROWSER_DEDUPE_ITEMS = _env_int("SCRAPER_BROWSER_DEDUPE_ITEMS", 256)
+
+# Selenium 页面就绪等待：最长等待时间（秒）、轮询间隔（秒）和“网络空闲”判定时长（秒）
+PAGE_WAIT_TIMEOUT = _env_float("SCRAPER_PAGE_WAIT_TIMEOUT", 10.0)
+PAGE_WAIT_POLL = _env_float("SCRAPER_PAGE_WAIT_POLL", 0.1)
+PAGE_NETWORK_IDLE = _env_float("SCRAPER_PAGE_NETWORK_IDLE", 0.5)
+
+# Chrome 浏览器：ChromeDriver 路径（为空时由 Selenium Manager 自动查找），
+# 浏览器配置（"text" 只加载文本所需资源，"full" 与普通无头 Chrome 相同），以及是否屏蔽广告/统计域名
+CHROMEDRIVER_PATH = os.environ.get("SCRAPER_CHROMEDRIVER_PATH") or None
+BROWSER_PROFILE = os.environ.get("SCRAPER_BROWSER_PROFILE", "text")
+BROWSER_BLOCK_TRACKERS = _env_int("SCRAPER_BROWSER_BLOCK_TRACKERS", 1) == 1
+
+# 混合抓取：静态 HTML 中段落文本少于该字符数时改用浏览器渲染；各域名的抓取方式记录在该文件中
+HYBRID_MIN_TEXT_CHARS = _env_int("SCRAPER_HYBRID_MIN_TEXT_CHARS", 500)
+HYBRID_DOMAIN_MODES_FILE = os.environ.get("SCRAPER_HYBRID_DOMAIN_MODES_FILE", "domain_modes.json")
+
+# HTML 解析后端："auto"（按 selectolax、lxml、html.parser 的顺序选择已安装的）或指定其中之一
+HTML_PARSER_BACKEND = os.environ.get("SCRAPER_HTML_PARSER_BACKEND", "auto")
+
+# 词性标注进程池：进程数（默认等于 CPU 核数）和每批交给一个进程的文章数
+POS_PROCESSES = _env_int("SCRAPER_POS_PROCESSES", os.cpu_count() or 1)
+POS_BATCH_SIZE = _env_int("SCRAPER_POS_BATCH_SIZE", 4)
+
+# 单词词性缓存：磁盘文件和内存中最多保留的单词数
+POS_CACHE_FILE = os.environ.get("SCRAPER_POS_CACHE_FILE", "pos_cache.sqlite")
+POS_CACHE_MEMORY_ITEMS = _env_int("SCRAPER_POS_CACHE_MEMORY_ITEMS", 100000)
+
+# 流水线：链接发现与抓取之间的队列长度（队列满时发现阶段暂停），以及每统计多少篇文章保存一次中间结果
+PIPELINE_QUEUE_SIZE = _env_int("SCRAPER_PIPELINE_QUEUE_SIZE", 32)
+CHECKPOINT_EVERY = _env_int("SCRAPER_CHECKPOINT_EVERY", 5)
+
+# 多来源并行爬取：默认启用的来源（逗号分隔），以及每个来源的默认预算——
+# 超时（秒，超时后使用该来源已保存的中间结果）、HTTP 抓取并发数、浏览器数量、链接数和搜索页数
+SOURCES = os.environ.get(
+    "SCRAPER_SOURCES",
+    "scrapper,yahoo,google,bing,duckduckgo,nature,bbc,baidu,reddit,warriorforum",
+).split(",")
+SOURCE_TIMEOUT = _env_float("SCRAPER_SOURCE_TIMEOUT", 600.0)
+SOURCE_WORKERS = _env_int("SCRAPER_SOURCE_WORKERS", 4)
+SOURCE_BROWSERS = _env_int("SCRAPER_SOURCE_BROWSERS", 2)
+SOURCE_LINK_COUNT = _env_int("SCRAPER_SOURCE_LINK_COUNT", 10)
+SOURCE_MAX_PAGES = _env_int("SCRAPER_SOURCE_MAX_PAGES", 3)
+
+
+def source_setting(source, name, default):
+    """
+    读取单个来源的预算：环境变量 SCRAPER_<来源>_<名称>（例如 SCRAPER_NATURE_TIMEOUT）优先，否则返回 default。
+    """
+    env_name = f"SCRAPER_{source.upper()}_{name.upper()}"
+    if isinstance(default, float):
+        return _env_float(env_name, default)
+    return _env_int(env_name, default)
+
+# 批量模式：任务文件（JSONL，每行一个查询任务）、结果文件（每个任务一行结果记录）和同时运行的任务数
+BATCH_JOBS_FILE = os.environ.get("SCRAPER_BATCH_JOBS_FILE", "jobs.jsonl")
+BATCH_RESULTS_FILE = os.environ.get("SCRAPER_BATCH_RESULTS_FILE", "batch_results.jsonl")
+BATCH_MAX_JOBS = _env_int("SCRAPER_BATCH_MAX_JOBS", 2)
+
+# 词频存储：按 (查询, 来源, 单词) 保存计数的 SQLite 文件
+WORD_STORE_FILE = os.environ.get("SCRAPER_WORD_STORE_FILE", "word_counts.sqlite")
+
+# 单词计数方式："exact"（精确计数）或 "approx"（内存固定的近似计数）；
+# 近似计数的 Count-Min 草图宽度和深度，以及跟踪的高频词数量（词云只显示前 200 个）
+COUNTER_MODE = os.environ.get("SCRAPER_COUNTER_MODE", "exact")
+APPROX_WIDTH = _env_int("SCRAPER_APPROX_WIDTH", 65536)
+APPROX_DEPTH = _env_int("SCRAPER_APPROX_DEPTH", 4)
+APPROX_TOP_K = _env_int("SCRAPER_APPROX_TOP_K", 1000)
+
+# NLTK 数据：本地数据目录（优先于 NLTK 默认路径查找），以及缺少资源时是否自动下载到该目录
+NLTK_DATA_DIR = os.environ.get("SCRAPER_NLTK_DATA_DIR", "nltk_data")
+NLTK_DOWNLOAD = _env_int("SCRAPER_NLTK_DOWNLOAD", 1) == 1
+
+# 词云：蒙版图片，以及批量渲染时的进程数
+WORDCLOUD_MASK = os.environ.get("SCRAPER_WORDCLOUD_MASK", "mask.png")
+WORDCLOUD_PROCESSES = _env_int("SCRAPER_WORDCLOUD_PROCESSES", os.cpu_count() or 1)
+
+# 翻译：后端（"google" 使用 googletrans，"stub" 为不访问网络的离线后端），
+# 每个请求的最大字符数（googletrans 单次上限约 5000）、并发请求数，以及按句缓存译文的 SQLite 文件
+TRANSLATOR_BACKEND = os.environ.get("SCRAPER_TRANSLATOR_BACKEND", "google")
+TRANSLATE_CHUNK_CHARS = _env_int("SCRAPER_TRANSLATE_CHUNK_CHARS", 4500)
+TRANSLATE_WORKERS = _env_int("SCRAPER_TRANSLATE_WORKERS", 4)
+TRANSLATION_CACHE_FILE = os.environ.get("SCRAPER_TRANSLATION_CACHE_FILE", "translations.sqlite")
+
+# 近似重复文档：MinHash 的哈希个数和 LSH 分段数（每段 PERMUTATIONS / BANDS 个哈希），
+# 按 SHINGLE 个连续单词切片，估计的 Jaccard 相似度不低于 THRESHOLD 时视为重复而跳过；少于 MIN_WORDS 个单词的文本不检查
+NEAR_DUP_ENABLED = _env_int("SCRAPER_NEAR_DUP_ENABLED", 1) == 1
+NEAR_DUP_PERMUTATIONS = _env_int("SCRAPER_NEAR_DUP_PERMUTATIONS", 128)
+NEAR_DUP_BANDS = _env_int("SCRAPER_NEAR_DUP_BANDS", 16)
+NEAR_DUP_SHINGLE = _env_int("SCRAPER_NEAR_DUP_SHINGLE", 5)
+NEAR_DUP_THRESHOLD = _env_float("SCRAPER_NEAR_DUP_THRESHOLD", 0.8)
+NEAR_DUP_MIN_WORDS = _env_int("SCRAPER_NEAR_DUP_MIN_WORDS", 50)
+
+# 原始页面存档：模式（"record" 把 HTTP 响应和浏览器渲染的页面追加写入存档，"replay" 只从存档读取、不访问网络，
+# "off" 关闭，默认），存档目录，以及单个 .warc.gz 文件的大小上限（字节，超过后换新文件）
+ARCHIVE_MODE = os.environ.get("SCRAPER_ARCHIVE_MODE", "off")
+ARCHIVE_DIR = os.environ.get("SCRAPER_ARCHIVE_DIR", "archive")
+ARCHIVE_MAX_FILE_BYTES = _env_int("SCRAPER_ARCHIVE_MAX_FILE_BYTES", 256 * 1024 * 1024)
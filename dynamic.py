@@ -1,57 +1,46 @@
-from word_cloud import get_word_counts,get_wordcloud
-from scrapper import get_search_links,count_words_in_articles,save_to_json
-from selenium_scraper import selenium_crawl as Google_Bing_Duckduckgo_selenium_crawl
-from Nature_BBC_scraper import selenium_crawl as Nature_BBC_selenium_crawl
-import json
-from collections import defaultdict
-from Baidu_scrapper import process_keyword
-from Engines_scrapper import yahoo_crawl
-from nltk import pos_tag
-from nltk.tokenize import word_tokenize
-import nltk
-
-def json_merge(query, *files):
+import time
+
+# 记录导入开始的时间，用于报告冷启动耗时
+_IMPORT_STARTED = time.perf_counter()
+
+import sys
+import threading
+import config
+from http_cache import get_cache
+from pos_cache import get_pos_cache
+from pipeline import Checkpoint, Stopped
+from rate_limit import get_rate_limiter
+from url_index import near_duplicate_index, shared_url_index, unique_links
+from word_store import MERGED, get_word_store
+from word_counter import count_summary
+
+def merge_counts(query, *sources):
+    """
+    合并一个查询在若干来源下的词频，按词性过滤后保存为该查询的合并结果。
+
+    参数:
+    query (str): 查询关键词。
+    sources (str): 要合并的来源名称。
 
+    返回:
+    dict: 过滤后的单词到次数的映射，按次数从高到低排列。
+    """
     # 允许的词性标签
     allowed_pos = {"NN", "NNS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ", "JJ", "JJR", "JJS"}
 
-        # 创建一个默认字典，用于存储合并后的结果
-    merged_data = defaultdict(int)
+    # 在词频存储中按单词求和
+    store = get_word_store()
+    merged_data = store.counts(query, sources)
 
-    # 遍历所有提供的文件名
-    for file_name in files:
-        try:
-            # 打开并读取每个JSON文件
-            with open(file_name, 'r', encoding='utf-8') as file:
-                data = json.load(file)  # 将文件内容加载为字典
-
-                # 遍历字典中的每个键值对
-                for key, value in data.items():
-                    # 将相同键的值累加
-                    merged_data[key] += value
-        except FileNotFoundError:
-            print(f"Warning: File {file_name} not found and will be skipped.")
-        except json.JSONDecodeError:
-            print(f"Warning: File {file_name} is not a valid JSON and will be skipped.")
-
-    # 词性过滤
-    filtered_data = defaultdict(int)
-    for word, count in merged_data.items():
-        # 去掉长度小于等于2的单词
-        if len(word) <= 2:
-            continue
-
-        # 对单词进行词性标注
-        tagged = pos_tag(word_tokenize(word))
-        if tagged and tagged[0][1] in allowed_pos:
-            filtered_data[word] = count
-
-    output_file = f"{query}_word_counts.json"
-    # 将合并后的数据保存到新的JSON文件中
-    with open(output_file, 'w', encoding='utf-8') as output_file:
-        json.dump(dict(merged_data), output_file, ensure_ascii=False, indent=4)
-
-    print(f"Files have been successfully merged into {output_file.name}")
+    # 词性过滤：去掉长度小于等于2的单词，其余单词的词性从缓存中批量获取，只有新词才需要标注
+    candidates = [word for word in merged_data if len(word) > 2]
+    tags = get_pos_cache().lookup_many(candidates)
+    filtered_data = {word: merged_data[word] for word in candidates if tags[word] in allowed_pos}
+
+    # 将过滤后的数据保存为合并结果
+    store.save(query, MERGED, filtered_data)
+    print(f"Sources {', '.join(sources)} have been successfully merged into {query}/{MERGED}")
+    return filtered_data
 
 def Nature_BBC_crawl(query):
     print("Nature_BBC_crawl:")
@@ -65,7 +54,7 @@ def Nature_BBC_crawl(query):
         print(f"输入无效: {e}. 默认设置为 10。")
         link_count = 10
 
-
+    from Nature_BBC_scraper import selenium_crawl as Nature_BBC_selenium_crawl
     Nature_BBC_selenium_crawl(query, source, link_count)
 
 def Google_Bing_Duckduckgo_crawl(query):
@@ -80,6 +69,7 @@ def Google_Bing_Duckduckgo_crawl(query):
         print(f"Invalid input: {e}. Defaulting to start_index=0 and link_count=30.")
         start_index = 0
         link_count = 30
+    from selenium_scraper import selenium_crawl as Google_Bing_Duckduckgo_selenium_crawl
     Google_Bing_Duckduckgo_selenium_crawl(query, engine, start_index, link_count)
 
 def Baidu_crawl(query):
@@ -87,33 +77,177 @@ def Baidu_crawl(query):
     num_pages = int(input("请输入您想要查询的页数（默认为10）：") or 10)
 
     # 调用处理函数
+    from Baidu_scrapper import process_keyword
     process_keyword(query, num_pages)
 
 
-def dynamic_crawl(query):
+def dynamic_crawl(query, max_workers=None, stop=None):
     """
     动态爬取数据并保存结果。
 
     参数:
     query (str): 查询关键词。
+    max_workers (int): 抓取并发数，默认取 config.FETCH_MAX_WORKERS。
+    stop (threading.Event): 被设置后停止计数，不再保存。
+    """
+    from scrapper import get_search_links, count_words_in_articles
+
+    links = get_search_links(query)
+    print("urls length: ", len(links))
+    print("urls :", links)
+    # 抓取时才认领链接，其他来源放弃的文档仍可补抓
+    urls = unique_links(links, query, "scrapper")
+    store = get_word_store()
+    # 每统计若干篇文章保存一次中间结果
+    checkpoint = Checkpoint(lambda counts: store.save(query, "scrapper", counts), stop=stop)
+    word_counts = count_words_in_articles(urls, checkpoint.update, max_workers, near_duplicate_index(query))
+    store.save(query, "scrapper", word_counts)
+    print(f"结果已保存到 {query}/scrapper，{count_summary(word_counts)}")
+
+# 支持的来源，各来源的计数以来源名保存在词频存储中
+SOURCES = ("scrapper", "yahoo", "google", "bing", "duckduckgo", "nature", "bbc", "baidu", "reddit", "warriorforum")
+
+def run_source(source, query, link_count=None, max_pages=None, pool=None, stop=None):
     """
-    urls = get_search_links(query)
-    print("urls length: ", len(urls))
-    print("urls :", urls)
-    word_counts = count_words_in_articles(urls)
-    save_to_json(word_counts, filename=f"{query}_scrapper_word_counts.json")
+    不经交互地运行单个来源，预算取自 config.source_setting。
+
+    参数:
+    source (str): 来源名称，SOURCES 之一。
+    query (str): 查询关键词。
+    link_count (int): 获取的链接数量，默认取该来源的 link_count 配置。
+    max_pages (int): 搜索结果页数（yahoo、baidu），默认取该来源的 max_pages 配置。
+    pool (BrowserPool): 共用的浏览器池；为空时 Selenium 来源各自新建一个。
+    stop (threading.Event): 被设置后来源停止翻页和计数，抛出 pipeline.Stopped。
+
+    各来源的模块（以及 selenium 等依赖）只在运行该来源时才导入。
+    """
+    workers = config.source_setting(source, "workers", config.SOURCE_WORKERS)
+    browsers = config.source_setting(source, "browsers", config.SOURCE_BROWSERS)
+    link_count = link_count or config.source_setting(source, "link_count", config.SOURCE_LINK_COUNT)
+    max_pages = max_pages or config.source_setting(source, "max_pages", config.SOURCE_MAX_PAGES)
+
+    if source == "scrapper":
+        dynamic_crawl(query, workers, stop)
+    elif source == "yahoo":
+        from Engines_scrapper import yahoo_crawl
+        yahoo_crawl(query, max_pages, workers, stop)
+    elif source in ("google", "bing", "duckduckgo"):
+        from selenium_scraper import selenium_crawl as Google_Bing_Duckduckgo_selenium_crawl
+        Google_Bing_Duckduckgo_selenium_crawl(query, source, 0, link_count, browsers, workers, pool, stop)
+    elif source in ("nature", "bbc"):
+        from Nature_BBC_scraper import selenium_crawl as Nature_BBC_selenium_crawl
+        Nature_BBC_selenium_crawl(query, source, link_count, browsers, pool, stop)
+    elif source == "baidu":
+        from Baidu_scrapper import process_keyword
+        process_keyword(query, max_pages, stop)
+    elif source == "reddit":
+        from reddit import cnki_crawl as reddit_crawl
+        reddit_crawl(query, link_count, browsers, pool, stop)
+    elif source == "warriorforum":
+        from warriorforum import cnki_crawl as warriorforum_crawl
+        warriorforum_crawl(query, link_count, browsers, pool, stop)
+    else:
+        raise ValueError(f"Unsupported source: {source}")
+
+def crawl_sources(query, sources=None, run=None):
+    """
+    同时运行多个来源，总耗时取决于最慢的来源而不是各来源之和。
+
+    每个来源在自己的线程中运行；出错的来源不影响其他来源，超过各自超时的来源
+    不再等待，使用它已经保存的中间结果：同时通知它停止（翻页和计数在下一次检查时结束），
+    并拒绝它之后的写入，存储中的计数与合并时使用的一致。
+
+    参数:
+    query (str): 查询关键词。
+    sources (list of str): 要运行的来源，默认取 config.SOURCES。
+    run (callable): 以 (source, query, stop) 运行单个来源的函数，默认为 run_source。
+
+    返回:
+    tuple: (各来源状态字典，值为 "ok"、"failed" 或 "timeout"；本次运行写入了计数的来源列表)
+    """
+    sources = sources or config.SOURCES
+    run_one = run or run_source
+    unknown = [source for source in sources if source not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unsupported source: {', '.join(unknown)}")
+
+    started = time.time()
+    status = {}
+    store = get_word_store()
+    stops = {source: threading.Event() for source in sources}
+    for source in sources:
+        store.unfence(query, source)
+
+    def run(source):
+        try:
+            run_one(source, query, stop=stops[source])
+            status.setdefault(source, "ok")
+        except Stopped:
+            status.setdefault(source, "timeout")
+        except Exception as e:
+            print(f"{source} 爬取失败: {e}")
+            status.setdefault(source, "failed")
+
+    # 各来源共用一个链接去重索引：同一文档只由第一个发现它的来源抓取和计数
+    with shared_url_index(query) as index:
+        # 守护线程：超时的来源不会阻止程序退出
+        threads = {}
+        for source in sources:
+            threads[source] = threading.Thread(target=run, args=(source,), name=f"source-{source}", daemon=True)
+            threads[source].start()
+
+        for source, thread in threads.items():
+            timeout = config.source_setting(source, "timeout", config.SOURCE_TIMEOUT)
+            thread.join(max(0.0, started + timeout - time.time()))
+            if thread.is_alive():
+                print(f"{source} 超时（{timeout:g} 秒），使用已保存的中间结果")
+                status.setdefault(source, "timeout")
+                store.fence(query, source)
+                stops[source].set()
+
+    # 记录每个文档被哪些来源发现
+    store.save_documents(query, index.documents())
+    print(index.report())
+    print(index.texts.report())
+
+    # 成功的来源，以及失败或超时前在本次运行中保存过中间结果的来源；不使用以前运行留下的旧计数
+    written = []
+    for source in sources:
+        updated_at = store.updated_at(query, source)
+        if updated_at is not None and (status[source] == "ok" or updated_at >= started):
+            written.append(source)
+    return status, written
+
+def run_query(query, sources=None):
+    """
+    并行爬取所有来源，合并结果并生成词云。
+    """
+    started = time.time()
+    status, written = crawl_sources(query, sources)
+    merge_counts(query, *written)
+    from word_cloud import get_word_counts, render_wordcloud
+    word_counts = get_word_counts(query)
+    if word_counts:
+        # 无界面地直接写出 PNG，不等待窗口关闭
+        render_wordcloud(word_counts, query)
+    print(f"{query}: 用时 {time.time() - started:.1f} 秒，各来源状态: {status}")
+    print(get_cache().report())
+    print(get_rate_limiter().report())
 
 def main():
+    """
+    用法: python dynamic.py [关键词 ...]
+    未提供关键词时交互输入；来源及其预算由 config 中的 SOURCES 和 SOURCE_* 配置。
+    """
+    print(f"启动用时 {time.perf_counter() - _IMPORT_STARTED:.2f} 秒")
+    if len(sys.argv) > 1:
+        for query in sys.argv[1:]:
+            run_query(query)
+        return
+
     while True:
         query = input("Please input query key word：")
-        #Nature_BBC_crawl(query)
-        #dynamic_crawl(query)
-        #Google_Bing_Duckduckgo_crawl(query)
-        #Baidu_crawl(query)
-        yahoo_crawl(query)
-        files = [f"{query}_scrapper_word_counts.json", f"{query}_duckduckgo_word_counts.json", f"{query}_bing_word_counts.json", f"{query}_google_word_counts.json",f"{query}_bbc_word_counts.json",f"{query}_nature_word_counts.json",f"{query}_Baidu_word_counts.json",f"{query}_yahoo_word_counts.json"]
-        json_merge(query, *files)
-        get_wordcloud(get_word_counts(query),query)
+        run_query(query)
 
 if __name__ == "__main__":
     main()
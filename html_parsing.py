@@ -0,0 +1,138 @@
+import importlib.util
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import config
+
+# 按速度从快到慢排列；selectolax 基于 C 实现的 Lexbor 引擎
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+
+def available_backends():
+    """
+    返回当前环境中已安装的解析后端。
+    """
+    return [name for name in BACKENDS if name == "html.parser" or importlib.util.find_spec(name) is not None]
+
+
+def resolve_backend(backend=None):
+    """
+    确定实际使用的解析后端；"auto" 时选择已安装的最快后端。
+    """
+    backend = backend or config.HTML_PARSER_BACKEND
+    if backend == "auto":
+        return available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported parser backend '{backend}'. Supported backends are: {list(BACKENDS)}")
+    return backend
+
+
+def _soup(html, backend, only):
+    # only 为标签名（或标签名列表）时只构建这些标签及其子节点，跳过页面的其余部分
+    parse_only = SoupStrainer(only) if only else None
+    return BeautifulSoup(html, backend, parse_only=parse_only)
+
+
+def select_text(html, selector, only=None, strip=False, backend=None):
+    """
+    提取匹配 CSS 选择器的所有元素的文本。
+
+    参数:
+    html (str): 页面 HTML。
+    selector (str): CSS 选择器，例如 "p" 或 "a.news-title"。
+    only (str or list): 仅解析这些标签，用于 BeautifulSoup 后端的局部解析；选择器必须只依赖这些标签。
+    strip (bool): 是否去掉每段文本首尾空白（与 get_text(strip=True) 相同）。
+    backend (str): 解析后端，默认取 config.HTML_PARSER_BACKEND。
+
+    返回:
+    list of str: 按文档顺序排列的元素文本。
+    """
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        return [node.text(deep=True, separator="", strip=strip) for node in LexborHTMLParser(html).css(selector)]
+    soup = _soup(html, backend, only)
+    return [element.get_text(strip=strip) for element in soup.select(selector)]
+
+
+def select_attr(html, selector, attr, only=None, backend=None):
+    """
+    提取匹配 CSS 选择器的所有元素的某个属性值，缺少该属性的元素会被跳过。
+
+    参数与 select_text 相同，attr 为属性名，例如 "href"。
+
+    返回:
+    list of str: 按文档顺序排列的属性值。
+    """
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        values = [node.attributes.get(attr) for node in LexborHTMLParser(html).css(selector)]
+    else:
+        soup = _soup(html, backend, only)
+        values = [element.get(attr) for element in soup.select(selector)]
+    return [value for value in values if value]
+
+
+def paragraph_text(html, backend=None):
+    """
+    拼接页面中所有 <p> 的文本，等价于 " ".join(p.get_text() for p in soup.find_all("p"))。
+    """
+    return " ".join(select_text(html, "p", only="p", backend=backend))
+
+
+def link_hrefs(html, backend=None):
+    """
+    返回页面中所有 <a href> 的链接。
+    """
+    return select_attr(html, "a[href]", "href", only="a", backend=backend)
+
+
+def _benchmark(pages, repeat):
+    for backend in available_backends():
+        for label, func in (("paragraph_text", paragraph_text), ("link_hrefs", link_hrefs)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for html in pages:
+                    func(html, backend=backend)
+            elapsed = (time.perf_counter() - start) / (repeat * len(pages))
+            print(f"{backend:<12} {label:<15} {elapsed * 1000:8.2f} ms/page")
+    # 对比局部解析与完整解析
+    for backend in ("lxml", "html.parser"):
+        if backend not in available_backends():
+            continue
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                " ".join(p.get_text() for p in BeautifulSoup(html, backend).find_all("p"))
+        elapsed = (time.perf_counter() - start) / (repeat * len(pages))
+        print(f"{backend:<12} {'full soup <p>':<15} {elapsed * 1000:8.2f} ms/page")
+
+
+def main():
+    """
+    在已保存的页面上比较各解析后端的速度。
+
+    用法: python html_parsing.py [页面目录] [重复次数]
+    页面目录默认为 HTTP 缓存的正文目录。
+    """
+    page_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.HTTP_CACHE_DIR, "bodies")
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    pages = []
+    for name in sorted(os.listdir(page_dir)):
+        with open(os.path.join(page_dir, name), "rb") as f:
+            pages.append(f.read().decode("utf-8", errors="replace"))
+    if not pages:
+        print(f"{page_dir} 中没有页面")
+        return
+
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1024:.0f} KB, repeat {repeat}")
+    _benchmark(pages, repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import config
+from http_session import http_get
+from page_archive import get_archive, is_recording, is_replaying
+
+# 只保留重新验证和解码需要的响应头
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class HttpCache:
+    """
+    按内容寻址的磁盘 HTTP 响应缓存。
+
+    响应正文以其 SHA-256 命名存放在 bodies/ 目录下，相同内容只存一份；
+    请求 URL 到正文的映射、ETag/Last-Modified 以及访问时间记录在 SQLite 索引中。
+    过期条目在重新抓取前先发送条件请求，服务器返回 304 时直接复用本地正文。
+    总容量超过上限时按最近最少使用（LRU）顺序淘汰。
+    """
+
+    def __init__(self, cache_dir=None, ttl=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.HTTP_CACHE_DIR
+        self.ttl = config.HTTP_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = config.HTTP_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.body_dir = os.path.join(self.cache_dir, "bodies")
+        os.makedirs(self.body_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                encoding TEXT,
+                headers TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._db.commit()
+
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.body_dir, body_hash)
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_hash, status, encoding, headers, stored_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        body_hash, status, encoding, headers, stored_at = row
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return {
+            "body": body,
+            "status": status,
+            "encoding": encoding,
+            "headers": json.loads(headers),
+            "stored_at": stored_at,
+        }
+
+    def _touch(self, url, refreshed=False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute("UPDATE entries SET stored_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            else:
+                self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, url))
+            self._db.commit()
+
+    def _store(self, url, response):
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body_hash, len(body), response.status_code, response.encoding, json.dumps(headers), now, now),
+            )
+            self._db.commit()
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self):
+        """
+        总容量超过上限时淘汰最久未访问的条目，并删除不再被引用的正文文件。
+        调用方需持有 self._lock。
+        """
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, body_hash, size FROM entries ORDER BY last_access").fetchall()
+        for url, body_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= size
+            self.stats["evictions"] += 1
+            still_used = self._db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone()
+            if not still_used:
+                try:
+                    os.remove(self._body_path(body_hash))
+                except FileNotFoundError:
+                    pass
+        self._db.commit()
+
+    @staticmethod
+    def _build_response(url, entry):
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"]
+        response.encoding = entry["encoding"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.url = url
+        return response
+
+    @staticmethod
+    def _archived(url, response):
+        # 缓存命中和 304 重建的响应没有经过 http_get 的存档，这里补记交给调用方的完整响应，回放时才能找到
+        if is_recording():
+            get_archive().record_response(url, response)
+        return response
+
+    def get(self, url, params=None, **kwargs):
+        """
+        带缓存的 GET 请求，接口与 http_session.http_get 相同。
+
+        参数:
+        url (str): 请求地址。
+        params (dict): 查询参数，会和 url 一起作为缓存键。
+        **kwargs: 传给 http_get 的其他参数。
+
+        返回:
+        requests.Response: 网络响应或由缓存重建的响应。
+        """
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        entry = self._lookup(full_url)
+
+        if entry is not None and time.time() - entry["stored_at"] < self.ttl:
+            self._count("hits")
+            self._touch(full_url)
+            return self._archived(full_url, self._build_response(full_url, entry))
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            # 条目已过期：带上校验信息，让服务器判断内容是否变化
+            if "ETag" in entry["headers"]:
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if "Last-Modified" in entry["headers"]:
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        response = http_get(full_url, headers=headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self._count("revalidated")
+            self._touch(full_url, refreshed=True)
+            return self._archived(full_url, self._build_response(full_url, entry))
+
+        self._count("misses")
+        if response.status_code == 200:
+            self._store(full_url, response)
+        return response
+
+    def report(self):
+        """
+        返回缓存命中统计的可读字符串。
+        """
+        lookups = self.stats["hits"] + self.stats["revalidated"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] + self.stats["revalidated"]) / lookups if lookups else 0.0
+        return (
+            f"HTTP cache: {self.stats['hits']} hits, {self.stats['revalidated']} revalidated, "
+            f"{self.stats['misses']} misses, {self.stats['evictions']} evictions, hit rate {hit_rate:.1%}"
+        )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    获取进程内共享的缓存实例，首次调用时创建。
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
+
+
+def cached_get(url, **kwargs):
+    """
+    通过共享磁盘缓存发送 GET 请求；config.HTTP_CACHE_ENABLED 为假时直接请求网络，
+    回放存档时直接读取存档，使结果只取决于存档内容。
+    """
+    if not config.HTTP_CACHE_ENABLED or is_replaying():
+        return http_get(url, **kwargs)
+    return get_cache().get(url, **kwargs)
@@ -0,0 +1,98 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+import config
+from page_archive import get_archive, is_recording, is_replaying
+from rate_limit import THROTTLE_STATUSES, get_rate_limiter
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session():
+    """
+    创建一个带连接池、长连接和重试退避的 requests.Session。
+
+    同一主机的后续请求会复用已建立的 TCP/TLS 连接；Accept-Encoding 由
+    urllib3 根据已安装的解码器生成（gzip/deflate，安装 brotli 后包含 br）。
+
+    返回:
+    requests.Session: 配置好的会话对象。
+    """
+    session = requests.Session()
+
+    retry = Retry(
+        total=config.HTTP_RETRIES,
+        backoff_factor=config.HTTP_BACKOFF_FACTOR,
+        # 429/503 由 http_get 交给限速器处理，以便按主机降速并遵守 Retry-After
+        status_forcelist=(500, 502, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=False,  # 否则 urllib3 仍会自行重试带 Retry-After 的 429/503
+        raise_on_status=False,  # 重试用尽后仍返回响应，由调用方检查状态码
+    )
+    # 连接池大小与并发抓取的线程数保持一致，避免线程之间争抢连接
+    adapter = HTTPAdapter(
+        pool_connections=config.FETCH_MAX_WORKERS,
+        pool_maxsize=config.FETCH_MAX_WORKERS,
+        max_retries=retry,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    session.headers.update(make_headers(keep_alive=True, accept_encoding=True))
+    session.headers["User-Agent"] = config.USER_AGENT
+    return session
+
+
+def get_session():
+    """
+    获取进程内共享的会话，首次调用时创建。
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def http_get(url, **kwargs):
+    """
+    通过共享会话发送 GET 请求，未指定 timeout 时使用配置中的连接/读取超时。
+
+    请求经过按主机的限速器；429/503 最多重试 config.HTTP_RETRIES 次，用尽后返回最后的响应。
+    存档模式为 record 时响应追加写入页面存档（304 没有正文，不写入；经 cached_get 的请求由缓存层补记完整响应）；为 replay 时只从存档读取，不在存档中的地址抛出 ConnectionError。
+
+    参数:
+    url (str): 请求地址。
+    **kwargs: 传给 requests.Session.get 的其他参数，例如 params、headers。
+
+    返回:
+    requests.Response: 响应对象。
+    """
+    if is_replaying():
+        full_url = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        response = get_archive().replay_response(full_url)
+        if response is None:
+            raise requests.ConnectionError(f"{full_url} 不在页面存档中")
+        return response
+
+    kwargs.setdefault("timeout", (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT))
+    limiter = get_rate_limiter()
+    for _ in range(config.HTTP_RETRIES + 1):
+        # 每个请求先从所在主机的令牌桶取令牌，收到 429/503 时限速器降速后再重试
+        limiter.wait(url)
+        response = get_session().get(url, **kwargs)
+        limiter.feedback(url, response.status_code, response.headers.get("Retry-After"))
+        if response.status_code not in THROTTLE_STATUSES:
+            break
+
+    if is_recording() and response.status_code not in THROTTLE_STATUSES and response.status_code != 304:
+        # 以请求的完整地址（含查询参数）为键，回放时按同样的地址查找
+        full_url = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        get_archive().record_response(full_url, response)
+    return response
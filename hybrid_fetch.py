@@ -0,0 +1,109 @@
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+import requests
+
+import config
+from http_cache import cached_get
+from html_parsing import paragraph_text
+
+_modes = None
+_modes_lock = threading.Lock()
+
+
+def _domain(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _load_modes():
+    global _modes
+    if _modes is None:
+        try:
+            with open(config.HYBRID_DOMAIN_MODES_FILE, "r", encoding="utf-8") as f:
+                _modes = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _modes = {}
+    return _modes
+
+
+def _save_modes():
+    tmp_path = f"{config.HYBRID_DOMAIN_MODES_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_modes, f, indent=4)
+    os.replace(tmp_path, config.HYBRID_DOMAIN_MODES_FILE)
+
+
+def learned_mode(url):
+    """
+    返回该域名已学到的抓取方式："js"（需要浏览器渲染）、"static"（静态 HTML 已足够），尚无记录时返回 None。
+    """
+    with _modes_lock:
+        record = _load_modes().get(_domain(url))
+    if not record:
+        return None
+    return "js" if record["js"] > record["static"] else "static"
+
+
+def record_mode(url, used_js):
+    """
+    记录一次抓取中该域名是否必须依赖浏览器渲染；只有该域名的判断（或新域名）发生变化时才写回磁盘。
+    """
+    with _modes_lock:
+        modes = _load_modes()
+        domain = _domain(url)
+        record = modes.get(domain)
+        before = None if record is None else record["js"] > record["static"]
+        record = modes.setdefault(domain, {"static": 0, "js": 0})
+        record["js" if used_js else "static"] += 1
+        if (record["js"] > record["static"]) != before:
+            _save_modes()
+
+
+def fetch_static_text(url):
+    """
+    通过普通 HTTP 请求获取页面的段落文本（未做英文过滤）。
+    """
+    response = cached_get(url)
+    response.raise_for_status()
+    return paragraph_text(response.text)
+
+
+def fetch_article_text_hybrid(url, pool, render_func):
+    """
+    先用 HTTP 获取静态页面，段落文本不足时再交给浏览器池渲染。
+
+    每个域名的抓取方式只在第一次遇到时探测（先静态，文本不足再渲染）并记录；
+    之后按记录直接选择：需要 JS 的域名直接走浏览器，静态页面已足够的域名只用 HTTP，
+    静态请求失败时才借用浏览器。
+
+    参数:
+    url (str): 文章链接。
+    pool (BrowserPool): 浏览器池，仅在需要渲染时借用。
+    render_func (callable): 接收 (url, browser) 并返回英文文本的函数，例如 selenium_scraper.fetch_article_text。
+
+    返回:
+    str: 提取的文章内容，仅保留英文字符。
+    """
+    mode = learned_mode(url)
+    static_text = ""
+    if mode != "js":
+        try:
+            static_text = re.sub(r"[^a-zA-Z\s]", "", fetch_static_text(url))
+            if mode == "static" or len(static_text.strip()) >= config.HYBRID_MIN_TEXT_CHARS:
+                if mode is None:
+                    record_mode(url, used_js=False)
+                return static_text
+        except requests.RequestException as e:
+            print(f"静态请求失败，改用浏览器: {url} 错误: {e}")
+
+    with pool.browser() as browser:
+        rendered_text = render_func(url, browser)
+
+    if mode is None:
+        # 探测：渲染后文本明显多于静态文本时，才认为该域名需要 JS
+        record_mode(url, used_js=len(rendered_text.strip()) > len(static_text.strip()) * 1.2)
+    return rendered_text if len(rendered_text) >= len(static_text) else static_text
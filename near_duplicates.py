@@ -0,0 +1,149 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import config
+
+# MinHash 使用的素数模数 2^31 - 1：系数和哈希值都小于它，乘积不会超出 uint64
+_PRIME = np.uint64((1 << 31) - 1)
+
+# 一次最多计算多少个切片的哈希，限制长文档的临时内存
+_BLOCK = 4096
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class NearDuplicateIndex:
+    """
+    流式的近似重复文档索引：MinHash 签名加 LSH 分段。
+
+    每篇文档按 shingle 个连续单词切片，计算 num_perm 个最小哈希；签名分成 bands 段，
+    任意一段完全相同的旧文档作为候选，再用签名估计 Jaccard 相似度，不低于 threshold 即为重复。
+    文档逐篇加入，不需要事先拿到全部文档；可以被多个线程同时使用。
+    """
+
+    def __init__(self, threshold=None, num_perm=None, bands=None, shingle=None, min_words=None):
+        self.threshold = config.NEAR_DUP_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm or config.NEAR_DUP_PERMUTATIONS
+        self.bands = bands or config.NEAR_DUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.rows = self.num_perm // self.bands
+        self.shingle = shingle or config.NEAR_DUP_SHINGLE
+        self.min_words = config.NEAR_DUP_MIN_WORDS if min_words is None else min_words
+
+        # 固定种子：同样的参数在不同运行中得到同样的签名
+        rng = random.Random(0)
+        self._a = np.array([rng.randrange(1, int(_PRIME)) for _ in range(self.num_perm)], dtype=np.uint64)
+        self._b = np.array([rng.randrange(0, int(_PRIME)) for _ in range(self.num_perm)], dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._signatures = []
+        self._urls = []
+        self.checked = 0
+        self.suppressed = []
+
+    def signature(self, text):
+        """
+        计算文本的 MinHash 签名；单词数少于 min_words 时返回 None（太短的文本相似度不可靠）。
+        """
+        words = _WORD.findall(text.lower())
+        if len(words) < max(self.min_words, 1):
+            return None
+        k = min(self.shingle, len(words))
+        shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        hashes %= _PRIME
+
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK, None]
+            np.minimum(signature, ((block * self._a + self._b) % _PRIME).min(axis=0), out=signature)
+        return signature
+
+    def _bands(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def check(self, url, text):
+        """
+        检查一篇文档是否与已加入的文档近似重复；不重复时把它加入索引。
+
+        参数:
+        url (str): 文档地址，用于报告。
+        text (str): 提取出的正文。
+
+        返回:
+        str: 与之重复的较早文档的地址；不重复（或文本太短无法判断）时返回 None。
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        keys = self._bands(signature)
+        with self._lock:
+            self.checked += 1
+            candidates = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            for doc in sorted(candidates):
+                if np.mean(self._signatures[doc] == signature) >= self.threshold:
+                    self.suppressed.append((url, self._urls[doc]))
+                    return self._urls[doc]
+
+            doc = len(self._signatures)
+            self._signatures.append(signature)
+            self._urls.append(url)
+            for key in keys:
+                self._buckets.setdefault(key, []).append(doc)
+        return None
+
+    def report(self):
+        """
+        返回近似重复检查的统计。
+        """
+        with self._lock:
+            return f"Near duplicates: {len(self.suppressed)} of {self.checked} documents suppressed"
+
+
+def is_near_duplicate(index, url, text):
+    """
+    各爬虫在提取正文之后、分词和标注之前调用：index 为 None 时不检查；
+    文档与同一运行中已处理的文档近似重复时打印提示并返回真。
+    """
+    if index is None or not text:
+        return False
+    original = index.check(url, text)
+    if original is None:
+        return False
+    print(f"跳过近似重复的文档: {url}（与 {original} 相似）")
+    return True
+
+
+def main():
+    """
+    在 HTTP 缓存的页面正文上运行近似重复检查，打印被跳过的页面和耗时。
+
+    用法: python near_duplicates.py [页面目录]
+    """
+    from html_parsing import paragraph_text
+
+    page_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.HTTP_CACHE_DIR, "bodies")
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    for name in sorted(os.listdir(page_dir)):
+        with open(os.path.join(page_dir, name), "rb") as f:
+            text = paragraph_text(f.read().decode("utf-8", errors="replace"))
+        original = index.check(name, text)
+        if original:
+            print(f"{name} ≈ {original}")
+    print(index.report(), f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+
+import config
+
+# 资源名到 nltk.data.find 查找路径的映射
+RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+}
+
+_ready = set()
+_lock = threading.Lock()
+
+
+def ensure_nltk_data(*names):
+    """
+    确认 NLTK 资源可用，在第一次使用资源之前调用，而不是在导入模块时下载。
+
+    先在 config.NLTK_DATA_DIR 和 NLTK 默认路径中查找；缺失时，若 config.NLTK_DOWNLOAD 为真，
+    下载到 config.NLTK_DATA_DIR，否则抛出 LookupError。每个资源在进程中只检查一次。
+
+    参数:
+    names (str): RESOURCES 中的资源名，例如 "stopwords"。
+    """
+    import nltk
+
+    with _lock:
+        data_dir = os.path.abspath(config.NLTK_DATA_DIR)
+        if data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+
+        for name in names:
+            if name in _ready:
+                continue
+            try:
+                nltk.data.find(RESOURCES[name])
+            except LookupError:
+                if not config.NLTK_DOWNLOAD:
+                    raise LookupError(
+                        f"NLTK resource {name} not found; run `python nltk_resources.py` to download it into {data_dir}."
+                    )
+                print(f"正在下载 NLTK 资源 {name} 到 {data_dir}")
+                os.makedirs(data_dir, exist_ok=True)
+                if not nltk.download(name, download_dir=data_dir, quiet=True):
+                    raise LookupError(f"Failed to download NLTK resource {name}.")
+            _ready.add(name)
+
+
+def main():
+    """
+    预先把全部 NLTK 资源下载到本地数据目录，之后可以设置 SCRAPER_NLTK_DOWNLOAD=0 离线运行。
+
+    用法: python nltk_resources.py
+    """
+    missing = []
+    for name in RESOURCES:
+        try:
+            ensure_nltk_data(name)
+            print(f"{name}: ok")
+        except LookupError as e:
+            print(f"{name}: {e}")
+            missing.append(name)
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import config
+
+# 正文已经解码，这些描述传输方式的响应头不再适用
+_DROPPED_HEADERS = ("Content-Encoding", "Transfer-Encoding", "Content-Length")
+
+
+def is_recording():
+    return config.ARCHIVE_MODE == "record"
+
+
+def is_replaying():
+    return config.ARCHIVE_MODE == "replay"
+
+
+def _warc_record(warc_type, url, content_type, payload, extra=None):
+    headers = {
+        "WARC-Type": warc_type,
+        "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+        "WARC-Date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "WARC-Target-URI": url,
+        **(extra or {}),
+        "Content-Type": content_type,
+        "Content-Length": str(len(payload)),
+    }
+    head = "WARC/1.0\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+    return head.encode("utf-8") + payload + b"\r\n\r\n"
+
+
+def _parse_headers(block):
+    headers = {}
+    for line in block.split("\r\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip()] = value.strip()
+    return headers
+
+
+class PageArchive:
+    """
+    WARC 格式的原始页面存档，只追加不修改。
+
+    每条记录单独压缩为一个 gzip 成员追加到当前的 .warc.gz 文件末尾（与 WARC 工具兼容），
+    文件超过 max_file_bytes 后换新文件；SQLite 索引记录每个 URL 的记录所在文件、偏移和长度，
+    回放时只需定位并解压这一条记录。requests 的响应保存为 response 记录（含状态行和响应头），
+    浏览器渲染后的 page_source 保存为 resource 记录。
+    同一 URL 的内容（正文哈希和状态码）与最新一条记录相同时不再追加，重复运行不会让存档无限增长。
+    """
+
+    def __init__(self, archive_dir=None, max_file_bytes=None):
+        self.archive_dir = archive_dir or config.ARCHIVE_DIR
+        self.max_file_bytes = max_file_bytes or config.ARCHIVE_MAX_FILE_BYTES
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_name = None
+        self._files_opened = 0
+        self._db = sqlite3.connect(os.path.join(self.archive_dir, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                url TEXT NOT NULL,
+                type TEXT NOT NULL,
+                file TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                status INTEGER,
+                archived_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS records_url ON records (url, type, archived_at);
+            """
+        )
+        # 旧版本创建的索引没有正文哈希列
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(records)")]
+        if "body_hash" not in columns:
+            self._db.execute("ALTER TABLE records ADD COLUMN body_hash TEXT")
+        self._db.commit()
+
+    def _open_file(self):
+        # 每个进程写自己的文件，多个进程同时抓取时不会交错写入同一个文件
+        self._files_opened += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._file_name = f"pages-{stamp}-{os.getpid()}-{self._files_opened}.warc.gz"
+        self._file = open(os.path.join(self.archive_dir, self._file_name), "ab")
+
+    def _unchanged(self, warc_type, url, status, body_hash):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, body_hash FROM records WHERE url = ? AND type = ? ORDER BY archived_at DESC LIMIT 1",
+                (url, warc_type),
+            ).fetchone()
+        return row == (status, body_hash)
+
+    def _append(self, warc_type, url, status, body_hash, record):
+        member = gzip.compress(record, compresslevel=6)
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_file_bytes:
+                if self._file is not None:
+                    self._file.close()
+                self._open_file()
+            offset = self._file.tell()
+            self._file.write(member)
+            self._file.flush()
+            self._db.execute(
+                "INSERT INTO records (url, type, file, offset, length, status, archived_at, body_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, warc_type, self._file_name, offset, len(member), status, time.time(), body_hash),
+            )
+            self._db.commit()
+
+    def record_response(self, url, response):
+        """
+        保存一个 requests 响应（正文为解码后的内容）；与该 URL 最新一条记录相同时跳过。
+        """
+        body = response.content or b""
+        body_hash = hashlib.sha256(body).hexdigest()
+        if self._unchanged("response", url, response.status_code, body_hash):
+            return
+        headers = "".join(
+            f"{name}: {value}\r\n" for name, value in response.headers.items() if name not in _DROPPED_HEADERS
+        )
+        payload = (
+            f"HTTP/1.1 {response.status_code} {response.reason or ''}\r\n{headers}"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode("utf-8") + body
+        record = _warc_record("response", url, "application/http; msgtype=response", payload)
+        self._append("response", url, response.status_code, body_hash, record)
+
+    def record_page(self, url, html):
+        """
+        保存浏览器渲染后的页面源码；与该 URL 最新一条记录相同时跳过。
+        """
+        body = html.encode("utf-8")
+        body_hash = hashlib.sha256(body).hexdigest()
+        if self._unchanged("resource", url, None, body_hash):
+            return
+        record = _warc_record("resource", url, "text/html; charset=utf-8", body, {"WARC-Source": "selenium"})
+        self._append("resource", url, None, body_hash, record)
+
+    def _read(self, file_name, offset, length):
+        with open(os.path.join(self.archive_dir, file_name), "rb") as f:
+            f.seek(offset)
+            record = gzip.decompress(f.read(length))
+        head, _, rest = record.partition(b"\r\n\r\n")
+        headers = _parse_headers(head.decode("utf-8"))
+        return headers, rest[:int(headers["Content-Length"])]
+
+    def _lookup(self, url, types):
+        placeholders = ",".join("?" * len(types))
+        with self._lock:
+            # 旧存档中可能有条件请求得到的 304 记录，它们没有正文，不能用于回放
+            row = self._db.execute(
+                f"SELECT type, file, offset, length FROM records WHERE url = ? AND type IN ({placeholders}) "
+                f"AND (status IS NULL OR status != 304) ORDER BY archived_at DESC LIMIT 1",
+                (url, *types),
+            ).fetchone()
+        if row is None:
+            return None
+        warc_type, file_name, offset, length = row
+        return (warc_type, *self._read(file_name, offset, length))
+
+    @staticmethod
+    def _parse_http(payload):
+        head, _, body = payload.partition(b"\r\n\r\n")
+        status_line, _, header_block = head.decode("iso-8859-1").partition("\r\n")
+        _, status, reason = (status_line.split(" ", 2) + [""])[:3]
+        return int(status), reason, _parse_headers(header_block), body
+
+    def replay_response(self, url):
+        """
+        从存档重建 requests.Response；URL 不在存档中时返回 None。
+        """
+        found = self._lookup(url, ("response",))
+        if found is None:
+            return None
+        _, _, payload = found
+        status, reason, headers, body = self._parse_http(payload)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response._content = body
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = url
+        return response
+
+    def replay_page(self, url):
+        """
+        返回存档中该 URL 的页面源码：优先使用浏览器渲染的版本，没有时使用 HTTP 响应的正文；都没有时返回 None。
+        """
+        found = self._lookup(url, ("resource", "response"))
+        if found is None:
+            return None
+        warc_type, _, payload = found
+        if warc_type == "resource":
+            return payload.decode("utf-8")
+        _, _, headers, body = self._parse_http(payload)
+        encoding = requests.utils.get_encoding_from_headers(CaseInsensitiveDict(headers)) or "utf-8"
+        return body.decode(encoding, errors="replace")
+
+    def summary(self):
+        """
+        返回各类记录的数量和存档文件的总大小。
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT type, COUNT(*), COUNT(DISTINCT url) FROM records GROUP BY type").fetchall()
+        size = sum(
+            os.path.getsize(os.path.join(self.archive_dir, name))
+            for name in os.listdir(self.archive_dir) if name.endswith(".warc.gz")
+        )
+        counts = ", ".join(f"{count} {warc_type} records ({urls} URLs)" for warc_type, count, urls in rows)
+        return f"Page archive: {counts or 'empty'}, {size / 1e6:.1f} MB"
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """
+    获取进程内共享的存档，首次调用时创建。
+    """
+    global _archive
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = PageArchive()
+    return _archive
+
+
+def main():
+    """
+    用法:
+    python page_archive.py            显示存档统计
+    python page_archive.py show 地址   打印存档中该地址的页面源码
+    """
+    archive = get_archive()
+    if len(sys.argv) == 3 and sys.argv[1] == "show":
+        html = archive.replay_page(sys.argv[2])
+        print(html if html is not None else f"{sys.argv[2]} 不在存档中")
+        return
+    print(archive.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import config
+from page_archive import get_archive, is_recording, is_replaying
+from rate_limit import get_rate_limiter
+
+# 各站点页面的就绪条件：
+#   selector     —— 目标元素（CSS 选择器）出现即视为内容已渲染
+#   ready_state  —— document.readyState 达到 complete
+#   network_idle —— 资源请求数在 config.PAGE_NETWORK_IDLE 秒内不再增长
+SITE_READINESS = {
+    "default": {"ready_state": True, "network_idle": True},
+    # 文章页：有轮询或统计请求的页面永远不会网络空闲，因此只等段落出现且文档加载完成
+    "article": {"selector": "p", "ready_state": True},
+    "nature_search": {"selector": "a[href*='/articles/']"},
+    "nature_article": {"selector": "#Abs1-content, h1.c-article-title"},
+    "bbc_search": {"selector": "a[href*='news/articles']"},
+    "google": {"selector": "#search a[href]"},
+    "bing": {"selector": "#b_results a[href]"},
+    "duckduckgo": {"selector": "a[data-testid='result-title-a']"},
+    "reddit_search": {"selector": "a.absolute.inset-0"},
+    "warriorforum_search": {"selector": "h3.ArticleSnapshot-title"},
+    "warriorforum_post": {"selector": "#main-post"},
+}
+
+
+class _NetworkIdle:
+    """
+    WebDriverWait 条件：页面已加载的资源数量在 idle_time 秒内没有变化。
+    """
+
+    def __init__(self, idle_time):
+        self.idle_time = idle_time
+        self.last_count = None
+        self.since = time.monotonic()
+
+    def __call__(self, browser):
+        count = browser.execute_script("return performance.getEntriesByType('resource').length")
+        now = time.monotonic()
+        if count != self.last_count:
+            self.last_count = count
+            self.since = now
+            return False
+        return now - self.since >= self.idle_time
+
+
+def _ready_state_complete(browser):
+    return browser.execute_script("return document.readyState") == "complete"
+
+
+def wait_until_ready(browser, site="default", timeout=None):
+    """
+    等待当前页面满足站点的就绪条件，条件满足立即返回，最长等待 timeout 秒。
+
+    超时不视为错误：与原先固定 sleep 的行为一致，继续使用已加载的内容。
+
+    参数:
+    browser: Selenium WebDriver 实例。
+    site (str): SITE_READINESS 中的站点名称，未知站点使用 "default"。
+    timeout (float): 最长等待时间，默认取 config.PAGE_WAIT_TIMEOUT。
+
+    返回:
+    bool: 是否在超时前满足了全部条件。
+    """
+    readiness = SITE_READINESS.get(site, SITE_READINESS["default"])
+    timeout = config.PAGE_WAIT_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    conditions = []
+    if readiness.get("selector"):
+        conditions.append(EC.presence_of_element_located((By.CSS_SELECTOR, readiness["selector"])))
+    if readiness.get("ready_state"):
+        conditions.append(_ready_state_complete)
+    if readiness.get("network_idle"):
+        conditions.append(_NetworkIdle(config.PAGE_NETWORK_IDLE))
+
+    # 依次等待各条件，所有条件共享同一个总超时
+    for condition in conditions:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            WebDriverWait(browser, remaining, poll_frequency=config.PAGE_WAIT_POLL).until(condition)
+        except TimeoutException:
+            print(f"页面等待超时（{timeout} 秒），使用已加载内容: {browser.current_url}")
+            return False
+    return True
+
+
+def load_page(browser, url, site="default", timeout=None):
+    """
+    打开 URL 并等待页面就绪，用于替代 browser.get(url) 之后的固定 sleep。
+
+    与 requests 共用按主机的限速器；浏览器拿不到状态码，因此只取令牌、不反馈。
+    存档模式为 record 时把就绪后的页面源码写入存档；回放时浏览器是 ReplayBrowser，页面直接取自存档，无需等待。
+    """
+    if is_replaying():
+        browser.get(url)
+        return True
+    get_rate_limiter().wait(url)
+    browser.get(url)
+    ready = wait_until_ready(browser, site, timeout)
+    if is_recording():
+        get_archive().record_page(url, browser.page_source)
+    return ready
+
+
+def click_and_wait(browser, element, site="default", timeout=None):
+    """
+    点击翻页等按钮并等待新内容就绪。
+
+    点击前记下当前页面上的一个目标元素，点击后先等它失效（旧内容被替换），
+    再检查站点的就绪条件，避免把旧页面误判为已加载完成。
+    """
+    timeout = config.PAGE_WAIT_TIMEOUT if timeout is None else timeout
+    selector = SITE_READINESS.get(site, {}).get("selector")
+    marker = None
+    if selector:
+        markers = browser.find_elements(By.CSS_SELECTOR, selector)
+        marker = markers[0] if markers else None
+
+    get_rate_limiter().wait(browser.current_url)
+    start = time.monotonic()
+    element.click()
+    if marker is not None:
+        # 单页应用可能原地更新而不替换元素，因此这里最多只用一半的等待时间
+        try:
+            WebDriverWait(browser, timeout / 2, poll_frequency=config.PAGE_WAIT_POLL).until(EC.staleness_of(marker))
+        except TimeoutException:
+            pass
+    return wait_until_ready(browser, site, max(0.0, timeout - (time.monotonic() - start)))
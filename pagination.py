@@ -0,0 +1,55 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import random
+import time
+
+import config
+
+_NO_PAGE = object()
+
+
+def fetch_pages(fetch_page, pages, max_workers=None, jitter=None):
+    """
+    并发抓取一组事先已知的翻页，按页码顺序逐页产出结果。
+
+    最多 max_workers 页同时请求（按顺序向后滑动）；除第一页外，每页请求前随机等待 0 到 jitter 秒，
+    请求速率另由 http_get 中的按主机限速器控制。某一页的结果为空时停止：
+    不再产出该页及之后的结果，尚未开始的请求被取消。
+
+    参数:
+    fetch_page (callable): 接收页码（或页面参数），返回该页的结果列表。
+    pages (iterable): 按顺序排列的页码，例如 range(num_pages)。
+    max_workers (int): 同时请求的页数，默认取 config.PAGINATE_WORKERS。
+    jitter (float): 随机延时上限（秒），默认取 config.PAGINATE_JITTER。
+
+    返回:
+    generator: 依次产出每一页的结果；某页抛出的异常在轮到该页时重新抛出。
+    """
+    max_workers = max_workers or config.PAGINATE_WORKERS
+    jitter = config.PAGINATE_JITTER if jitter is None else jitter
+    pages = iter(pages)
+
+    def run(page, first):
+        if not first and jitter > 0:
+            time.sleep(random.uniform(0, jitter))
+        return fetch_page(page)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for index, page in enumerate(pages):
+            pending.append(executor.submit(run, page, index == 0))
+            if len(pending) >= max_workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            if not result:
+                return
+            # 先补充下一页的请求，再产出当前页，下游处理时后续页面仍在抓取
+            page = next(pages, _NO_PAGE)
+            if page is not _NO_PAGE:
+                pending.append(executor.submit(run, page, False))
+            yield result
+    finally:
+        # 提前停止（空页、下游不再需要或出错）时不等待剩余请求
+        executor.shutdown(wait=False, cancel_futures=True)
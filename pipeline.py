@@ -0,0 +1,118 @@
+import multiprocessing
+import queue
+import threading
+
+import config
+
+# 生产者结束的标记
+DONE = object()
+
+
+class Stopped(Exception):
+    """
+    来源已被要求停止（例如超过了 crawl_sources 中的超时），由 check_stop 和 Checkpoint.update 抛出。
+    """
+
+
+def is_stopped(stop):
+    """
+    stop（threading.Event 或 None）是否已被设置。
+    """
+    return stop is not None and stop.is_set()
+
+
+def check_stop(stop):
+    """
+    stop 已被设置时抛出 Stopped，结束来源的爬取。
+    """
+    if is_stopped(stop):
+        raise Stopped()
+
+
+def process_context():
+    """
+    返回创建工作进程池使用的 multiprocessing 上下文。
+
+    主进程中有大量 Selenium 和 HTTP 线程，不直接 fork，而是从干净的 forkserver 进程派生工作进程；
+    不支持 forkserver 的平台使用默认方式。
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+
+
+class _ProducerError:
+    def __init__(self, error):
+        self.error = error
+
+
+def start_producer(iterable, maxsize=None):
+    """
+    在后台线程中迭代 iterable（例如链接发现生成器），把元素放入有界队列。
+
+    队列满时生产者线程被阻塞，下游处理不过来时链接发现会自动放慢（背压）。
+    迭代结束后放入 DONE；生产者抛出的异常会通过 get_item() 在消费者一侧重新抛出。
+
+    参数:
+    iterable: 任意可迭代对象或生成器。
+    maxsize (int): 队列长度，默认取 config.PIPELINE_QUEUE_SIZE。
+
+    返回:
+    queue.Queue: 供下游读取的队列。
+    """
+    items = queue.Queue(maxsize=maxsize or config.PIPELINE_QUEUE_SIZE)
+
+    def run():
+        try:
+            for item in iterable:
+                items.put(item)
+        except Exception as e:
+            items.put(_ProducerError(e))
+        items.put(DONE)
+
+    threading.Thread(target=run, daemon=True).start()
+    return items
+
+
+def get_item(items, block=True, timeout=None):
+    """
+    从 start_producer 返回的队列中取出一个元素；生产者出错时在这里抛出其异常。
+
+    返回:
+    元素本身，或者结束标记 DONE。队列暂时为空且 block 为假时抛出 queue.Empty。
+    """
+    item = items.get(block=block, timeout=timeout)
+    if isinstance(item, _ProducerError):
+        raise item.error
+    return item
+
+
+def stream(iterable, maxsize=None):
+    """
+    以生成器形式读取后台生产者的输出，使链接发现与后续处理并行进行。
+    """
+    items = start_producer(iterable, maxsize)
+    while True:
+        item = get_item(items)
+        if item is DONE:
+            return
+        yield item
+
+
+class Checkpoint:
+    """
+    计数过程中的定期保存：每处理 every 篇文章调用一次 save(counts)，
+    程序中途崩溃时已统计的结果不会全部丢失。
+    stop 被设置后 update 抛出 Stopped，计数循环随之结束，不再保存。
+    """
+
+    def __init__(self, save, every=None, stop=None):
+        self.save = save
+        self.every = every or config.CHECKPOINT_EVERY
+        self.stop = stop
+        self.updates = 0
+
+    def update(self, counts):
+        check_stop(self.stop)
+        self.updates += 1
+        if self.updates % self.every == 0:
+            self.save(counts)
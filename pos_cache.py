@@ -0,0 +1,96 @@
+from collections import OrderedDict
+import sqlite3
+import threading
+
+import config
+from nltk_resources import ensure_nltk_data
+from sql_chunks import in_chunks
+
+
+class PosCache:
+    """
+    单词到词性标签的持久缓存。
+
+    内存中按最近最少使用保留最多 max_items 个单词，其余保存在 SQLite 文件中；
+    只有两处都未命中的单词才会被标注，并且一次批量完成。
+    """
+
+    def __init__(self, path=None, max_items=None):
+        self.max_items = max_items or config.POS_CACHE_MEMORY_ITEMS
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or config.POS_CACHE_FILE, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS pos (word TEXT PRIMARY KEY, tag TEXT NOT NULL)")
+        self._db.commit()
+
+    def _remember(self, word, tag):
+        self._memory[word] = tag
+        self._memory.move_to_end(word)
+        if len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def lookup_many(self, words):
+        """
+        获取一组单词的词性标签。
+
+        每个单词单独标注（与 pos_tag(word_tokenize(word)) 的结果一致），
+        取第一个分词的标签；无法分词的单词标签为空字符串。
+
+        参数:
+        words (iterable of str): 要查询的单词。
+
+        返回:
+        dict: 单词到词性标签的映射。
+        """
+        result = {}
+        missing = []
+        with self._lock:
+            for word in dict.fromkeys(words):
+                tag = self._memory.get(word)
+                if tag is None:
+                    missing.append(word)
+                else:
+                    self._memory.move_to_end(word)
+                    result[word] = tag
+
+            # 内存未命中的单词到磁盘中查找
+            unseen = []
+            for chunk, placeholders in in_chunks(missing):
+                found = dict(self._db.execute(f"SELECT word, tag FROM pos WHERE word IN ({placeholders})", chunk))
+                for word in chunk:
+                    if word in found:
+                        result[word] = found[word]
+                        self._remember(word, found[word])
+                    else:
+                        unseen.append(word)
+
+            if unseen:
+                # 只对新词做一次批量标注，每个单词作为独立的句子；NLTK 只在确实需要标注时才导入
+                from nltk import pos_tag_sents
+                from nltk.tokenize import word_tokenize
+
+                ensure_nltk_data("punkt_tab", "averaged_perceptron_tagger_eng")
+                tagged_sents = pos_tag_sents([word_tokenize(word) for word in unseen])
+                new_tags = [(word, tagged[0][1] if tagged else "") for word, tagged in zip(unseen, tagged_sents)]
+                self._db.executemany("INSERT OR REPLACE INTO pos VALUES (?, ?)", new_tags)
+                self._db.commit()
+                for word, tag in new_tags:
+                    result[word] = tag
+                    self._remember(word, tag)
+        return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pos_cache():
+    """
+    获取进程内共享的词性缓存，首次调用时创建。
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PosCache()
+    return _cache
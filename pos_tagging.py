@@ -0,0 +1,142 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import threading
+
+import config
+from near_duplicates import is_near_duplicate
+from nltk_resources import ensure_nltk_data
+from pipeline import process_context
+from url_index import release_link
+
+# 每个工作进程各自持有一个标注器，只在进程启动时加载一次
+_tagger = None
+
+
+def _init_worker():
+    global _tagger
+    # 资源已由主进程准备好，这里只把本地数据目录加入查找路径
+    ensure_nltk_data("averaged_perceptron_tagger_eng")
+    from nltk.tag.perceptron import PerceptronTagger
+    _tagger = PerceptronTagger()
+
+
+def _tag_batch(token_lists):
+    # 与 nltk.pos_tag(tokens) 对英文的处理相同
+    return [_tagger.tag(tokens) if tokens else [] for tokens in token_lists]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_tagging_pool():
+    """
+    获取进程内共享的标注进程池，首次调用时创建；同时运行的各来源共用这 config.POS_PROCESSES 个工作进程。
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # 在启动工作进程之前确认标注模型可用，避免每个进程各自下载
+                ensure_nltk_data("averaged_perceptron_tagger_eng")
+                _pool = ProcessPoolExecutor(
+                    max_workers=config.POS_PROCESSES, mp_context=process_context(), initializer=_init_worker
+                )
+    return _pool
+
+
+class TaggingStage:
+    """
+    批量词性标注，批次交给共享的标注进程池。
+
+    调用 submit() 提交每篇文章的分词结果，凑满一批后立即交给进程池，
+    因此标注与文章抓取同时进行；ready() 产出已完成的结果，
+    results() 等待并产出剩余的全部结果。
+    """
+
+    def __init__(self, batch_size=None):
+        """
+        参数:
+        batch_size (int): 每批的文章数，默认取 config.POS_BATCH_SIZE。
+        """
+        self.batch_size = batch_size or config.POS_BATCH_SIZE
+        self._executor = get_tagging_pool()
+        self._batch = []
+        self._futures = []
+
+    def submit(self, tokens):
+        """
+        提交一篇文章的分词列表。
+        """
+        self._batch.append(tokens)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self._futures.append(self._executor.submit(_tag_batch, self._batch))
+            self._batch = []
+
+    def ready(self):
+        """
+        不等待，逐篇产出已经标注完成的结果，供调用方边抓取边计数。
+        """
+        done = [future for future in self._futures if future.done()]
+        if not done:
+            return
+        self._futures = [future for future in self._futures if future not in done]
+        for future in done:
+            for tagged_words in future.result():
+                yield tagged_words
+
+    def results(self):
+        """
+        提交剩余的文章，并按完成顺序逐篇产出 [(word, pos), ...] 列表。
+        """
+        self._flush()
+        for future in as_completed(self._futures):
+            for tagged_words in future.result():
+                yield tagged_words
+        self._futures = []
+
+    def close(self):
+        # 进程池由各阶段共用，这里只取消本阶段尚未开始的批次
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        self._batch = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def tag_articles(articles, tokenize, on_tagged, duplicates=None, urls=None):
+    """
+    对逐篇到达的文章分词并标注词性，标注与后续文章的抓取同时进行。
+    正文为空（抓取失败）的文章放弃认领，交给其他发现它的来源补抓。
+
+    参数:
+    articles (iterable): 按完成顺序产出 (url, 正文) 的迭代器，例如 pool.map 或 fetch_all 的结果。
+    tokenize (callable): 把正文转为单词列表的函数。
+    on_tagged (callable): 每篇文章标注完成后以 [(word, pos), ...] 调用。
+    duplicates (NearDuplicateIndex): 与其中已有文章近似重复的文章跳过；为 None 时不检查。
+    urls (SourceLinks): 产生这些文章的链接（unique_links 的返回值），抓取失败的文章通过它放弃认领。
+    """
+    with TaggingStage() as tagger:
+        for url, article_text in articles:
+            print(f"正在处理: {url}")
+            if not article_text:
+                release_link(urls, url)
+                continue
+            if is_near_duplicate(duplicates, url, article_text):
+                continue
+            tagger.submit(tokenize(article_text))
+            # 已经标注完成的文章立即计入，计数随结果到达而更新
+            for tagged_words in tagger.ready():
+                on_tagged(tagged_words)
+
+        # 等待剩余文章的标注结果
+        for tagged_words in tagger.results():
+            on_tagged(tagged_words)
@@ -0,0 +1,197 @@
+from email.utils import parsedate_to_datetime
+import sys
+import threading
+import time
+
+import config
+from concurrent_fetch import get_host
+
+# 表示主机要求降速的状态码
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 响应头，支持秒数和 HTTP 日期两种格式。
+
+    返回:
+    float: 需要等待的秒数；没有或无法解析时返回 None。
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class HostBucket:
+    """
+    单个主机的令牌桶。
+
+    令牌按 rate 每秒补充，最多积累 burst 个；取令牌时令牌可以为负，
+    表示排在后面的请求需要等待的时间，等待在锁外完成。
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate or config.RATE_LIMIT_RPS
+        self.burst = burst or config.RATE_LIMIT_BURST
+        self.tokens = float(self.burst)
+        # 上次补充令牌的时间；主机要求暂停时设为暂停结束的时间
+        self.updated = time.monotonic()
+        self.last_backoff = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    def reserve(self, now):
+        """
+        取一个令牌，返回需要等待的秒数。
+        """
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        self.tokens -= 1
+        self.requests += 1
+        ready = self.updated + max(0.0, -self.tokens) / self.rate
+        return max(0.0, ready - now)
+
+    def backoff(self, now, retry_after=None):
+        """
+        主机返回 429/503 时降低速率；有 Retry-After 时在此之前不再发出请求。
+        """
+        self.throttled += 1
+        # 同一批并发请求先后收到的限流响应只降速一次
+        if now - self.last_backoff >= 1 / self.rate:
+            self.rate = max(config.RATE_LIMIT_MIN_RPS, self.rate * config.RATE_LIMIT_BACKOFF)
+            self.last_backoff = now
+        if retry_after is not None:
+            until = now + min(retry_after, config.RATE_LIMIT_MAX_PAUSE)
+            if until > self.updated:
+                # 暂停结束时只留一个令牌，之后按降低后的速率发出请求
+                self.tokens = 1.0
+                self.updated = until
+
+    def recover(self):
+        """
+        请求成功时缓慢提高速率（加性增、乘性减）。
+        """
+        self.rate = min(config.RATE_LIMIT_MAX_RPS, self.rate + config.RATE_LIMIT_STEP)
+
+
+class RateLimiter:
+    """
+    所有抓取路径共用的按主机限速器。
+
+    每个主机一个令牌桶，速率根据该主机的 429/503 响应和 Retry-After 自动调整，
+    不同主机之间互不影响，因此总体抓取速度取决于各主机各自允许的速度。
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = config.RATE_LIMIT_ENABLED if enabled is None else enabled
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets.setdefault(host, HostBucket())
+        return bucket
+
+    def wait(self, url):
+        """
+        等待直到可以向 URL 所在的主机发出下一个请求。
+
+        返回:
+        float: 实际等待的秒数。
+        """
+        if not self.enabled:
+            return 0.0
+        host = get_host(url)
+        with self._lock:
+            delay = self._bucket(host).reserve(time.monotonic())
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def feedback(self, url, status, retry_after=None):
+        """
+        根据响应调整主机的速率。
+
+        参数:
+        url (str): 请求地址。
+        status (int): 响应状态码。
+        retry_after (str): Retry-After 响应头的原始值，可以为 None。
+        """
+        if not self.enabled:
+            return
+        host = get_host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            if status in THROTTLE_STATUSES:
+                bucket.backoff(time.monotonic(), parse_retry_after(retry_after))
+            elif status < 400:
+                bucket.recover()
+
+    def report(self):
+        """
+        返回各主机当前速率和限流次数的可读字符串。
+        """
+        with self._lock:
+            items = sorted(self._buckets.items(), key=lambda item: -item[1].requests)
+            hosts = ", ".join(
+                f"{host} {bucket.rate:.1f}/s ({bucket.requests} requests, {bucket.throttled} throttled)"
+                for host, bucket in items[:10]
+            )
+        return f"Rate limits: {hosts or 'no requests'}"
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    获取进程内共享的限速器，首次调用时创建。
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def main():
+    """
+    模拟一个每秒最多接受 max_rps 个请求的主机，观察限速器的速率如何收敛。
+
+    用法: python rate_limit.py [请求数] [主机允许的每秒请求数]
+    """
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    max_rps = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+
+    limiter = RateLimiter(enabled=True)
+    url = "http://example.test/page"
+    recent = []
+    start = time.monotonic()
+    for i in range(total):
+        limiter.wait(url)
+        now = time.monotonic()
+        recent = [t for t in recent if now - t < 1.0]
+        if len(recent) >= max_rps:
+            limiter.feedback(url, 429, "1")
+        else:
+            recent.append(now)
+            limiter.feedback(url, 200)
+    elapsed = time.monotonic() - start
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f}/s, host allows {max_rps}/s)")
+    print(limiter.report())
+
+
+if __name__ == "__main__":
+    main()
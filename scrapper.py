@@ -1,16 +1,17 @@
 import requests
-from bs4 import BeautifulSoup
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from collections import Counter
 import json
 import re
 
-# 确保nltk的停用词被下载（如果没下载过）
-import nltk
-nltk.download("punkt")
-nltk.download("punkt_tab")
-nltk.download("stopwords")
+from concurrent_fetch import fetch_all
+from http_cache import cached_get
+from html_parsing import link_hrefs, paragraph_text
+from word_counter import new_counter
+from url_index import canonical_url, release_link
+from near_duplicates import is_near_duplicate
+from text_tokens import compile_filter
+from nltk_resources import ensure_nltk_data
+
 
 def get_search_links(query):
     """
@@ -24,29 +25,19 @@ def get_search_links(query):
     """
     # Google搜索URL的格式
     url = f"https://www.google.com/search?q={query}"
-    # 模拟浏览器的User-Agent头，以避免服务器拒绝请求
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
-    # 发送GET请求到Google搜索页面
-    response = requests.get(url, headers=headers)
-    # 使用BeautifulSoup解析响应的HTML内容
-    soup = BeautifulSoup(response.text, "html.parser")
 
+    # 通过共享会话和磁盘缓存发送GET请求到Google搜索页面
+    response = cached_get(url)
     urls = []
-    # 遍历所有<a>标签以找到链接
-    for link in soup.find_all("a"):
-        href = link.get("href")
-        # 检查链接是否符合包含 /url?q= 或者以 http 开头的完整网址
-        if href and ("/url?q=" in href or href.startswith("http")) and "translate.google.com/translate" not in href:
-            # 对于包含 /url?q= 的链接，进行切分，提取实际网址
-            if "/url?q=" in href:
-                href = href.split("/url?q=")[1].split("&")[0]
+    # 只解析<a href>标签以找到链接
+    for href in link_hrefs(response.text):
+        # 展开 /url?q= 等重定向包装、去掉追踪参数，只保留 http(s) 网址
+        link = canonical_url(href)
+        if link and "translate.google.com/translate" not in link:
             # 将提取的网址添加到列表中
-            urls.append(href)
+            urls.append(link)
     # 打印网址列表的长度
-    print("url length:", len(url))
+    print("url length:", len(urls))
 
     # 返回网址列表的子集，从第10个到第40个链接
     return urls[10:40]
@@ -64,16 +55,11 @@ def fetch_article_text(url):
     str: 过滤后的英文文本内容。
     """
     try:
-        # 发起HTTP请求获取页面内容，使用headers模拟浏览器访问
-        response = requests.get(url, headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
+        # 通过磁盘缓存和共享会话获取页面内容，近期抓取过的页面不再访问网络
+        response = cached_get(url)
         response.raise_for_status()  # 检查是否成功获取内容
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # 获取页面的所有文本
-        text = " ".join([p.get_text() for p in soup.find_all("p")])
+        # 只解析<p>标签，获取页面的所有段落文本
+        text = paragraph_text(response.text)
         #print("text: ", text)
         # 筛选仅包含英文字符的内容
         english_text = re.sub(r"[^a-zA-Z\s]", "", text)
@@ -85,35 +71,44 @@ def fetch_article_text(url):
 
 
 
-def count_words_in_articles(urls):
+def count_words_in_articles(urls, on_update=None, max_workers=None, duplicates=None):
     """
     统计一组文章中每个单词的出现次数，排除停用词。
 
     参数:
-    urls (list of str): 文章的URL列表。
+    urls (iterable of str): 文章的URL列表，也可以是边发现边产出链接的生成器。
+    on_update (callable): 每统计完一篇文章后以当前计数调用，例如 Checkpoint.update。
+    max_workers (int): 抓取并发数，默认取 config.FETCH_MAX_WORKERS。
+    duplicates (NearDuplicateIndex): 近似重复索引，转载和镜像页面不再计数；为空时不检查。
 
     返回:
-    Counter: 包含每个单词及其出现次数的Counter对象。
+    WordCounter 或 ApproxCounter: 包含每个单词及其出现次数的计数器（由 config.COUNTER_MODE 决定）。
     """
     # 初始化一个计数器对象，用于统计单词出现次数
-    all_words = Counter()
-    # 获取英文停用词集合
+    all_words = new_counter()
+    # 获取英文停用词集合，生成分词并过滤停用词的函数
+    ensure_nltk_data("stopwords")
     stop_words = set(stopwords.words("english"))
+    filter_words = compile_filter(stop_words)
 
-    # 遍历每个URL，处理文章
-    for url in urls:
+    # 并发抓取文章，每下载完成一篇就立即分词统计
+    for url, article_text in fetch_all(urls, fetch_article_text, max_workers=max_workers):
         # 打印当前处理的URL
         print(f"正在处理: {url}")
-        # 获取文章正文
-        article_text = fetch_article_text(url)
-
-        # 使用nltk进行分词
-        words = word_tokenize(article_text.lower())
-
-        # 仅统计非停用词的英文单词
-        filtered_words = [word for word in words if word.isalpha() and word not in stop_words]
+        if not article_text:
+            # 抓取失败：放弃认领，其他发现该文档的来源可以补抓
+            release_link(urls, url)
+            continue
+        # 与已统计的文章近似重复（转载、镜像）时跳过
+        if is_near_duplicate(duplicates, url, article_text):
+            continue
+
+        # 分词并仅保留非停用词的英文单词（结果与 word_tokenize 加过滤相同）
+        filtered_words = filter_words(article_text)
         # 更新计数器
         all_words.update(filtered_words)
+        if on_update:
+            on_update(all_words)
 
     # 返回统计结果
     return all_words
@@ -122,7 +117,7 @@ def count_words_in_articles(urls):
 
 def save_to_json(word_counts, filename="calc.json"):
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(word_counts, f, indent=4)
+        json.dump(dict(word_counts), f, indent=4)
     print(f"结果已保存到 {filename}")
 
 def main():
@@ -1,37 +1,40 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from collections import Counter
-import time
+from contextlib import nullcontext
 import json
-import nltk
 import re
 
+from browser_factory import init_browser
+from html_parsing import link_hrefs, paragraph_text
+from page_wait import load_page
+from pos_tagging import tag_articles
+from pipeline import Checkpoint
+from browser_pool import BrowserPool
+from concurrent_fetch import fetch_all
+from hybrid_fetch import fetch_article_text_hybrid
+from word_store import get_word_store
+from word_counter import count_summary, new_counter
+from text_tokens import tokenize
+from url_index import canonical_url, near_duplicate_index, unique_links
+from nltk_resources import ensure_nltk_data
+
 # 确保 nltk 的停用词被下载（如果没下载过）
 # nltk.download("punkt")
 # nltk.download("stopwords")
 
-# 配置 Chrome Driver
-def init_browser():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 无头模式（不显示浏览器窗口）
-    chrome_options.add_argument("--disable-gpu")  # 禁用 GPU 加速
-    chrome_options.add_argument("--no-sandbox")  # 禁用沙盒模式
-    chrome_options.add_argument("--disable-dev-shm-usage")  # 禁用/dev/shm 使用
-    service = Service("D:\Anaconda/chromedriver.exe")  # 替换为你的 ChromeDriver 路径
-    browser = webdriver.Chrome(service=service, options=chrome_options)
-    return browser
-
 def remove_chinese(text):
     """
     移除文本中的中文字符。
     """
     return re.sub(r'[\u4e00-\u9fff]+', '', text)
 
+# 搜索引擎自身的页面（导航、设置、隐私说明等），不作为搜索结果
+ENGINE_HOSTS = {
+    "google": ("google.com",),
+    "bing": ("bing.com", "microsoft.com"),
+    "duckduckgo": ("duckduckgo.com",),
+}
+
 def get_search_links(query, browser, engine="google", start_index=0, link_count=30):
     """
     使用 Selenium 从指定搜索引擎获取链接，默认使用英文搜索。
@@ -59,16 +62,18 @@ def get_search_links(query, browser, engine="google", start_index=0, link_count=
         raise ValueError(f"Unsupported engine '{engine}'. Supported engines are: {list(engine_urls.keys())}")
 
     search_url = engine_urls[engine]
-    browser.get(search_url)
-    time.sleep(3)  # 等待页面加载
+    load_page(browser, search_url, engine)  # 等待搜索结果出现
 
-    # 通用的结果解析逻辑
-    soup = BeautifulSoup(browser.page_source, "html.parser")
+    # 通用的结果解析逻辑：展开重定向包装并去掉追踪参数，排除搜索引擎自身的链接和页面内的重复链接
     urls = []
-    for link in soup.find_all("a"):
-        href = link.get("href")
-        if href and "http" in href:  # 简单过滤 URL
-            urls.append(href)
+    for href in link_hrefs(browser.page_source):
+        url = canonical_url(href)
+        if url is None or url in urls:
+            continue
+        host = url.split("/")[2]
+        if any(host == site or host.endswith("." + site) for site in ENGINE_HOSTS[engine]):
+            continue
+        urls.append(url)
 
     # 跳过前面的 start_index 个链接，返回后续的 link_count 个
     return urls[start_index:start_index + link_count]
@@ -85,28 +90,31 @@ def fetch_article_text(url, browser):
     str: 提取的文章内容，仅保留英文字符。
     """
     try:
-        browser.get(url)
-        time.sleep(5)  # 等待页面加载
-        soup = BeautifulSoup(browser.page_source, "html.parser")
-        text = " ".join([p.get_text() for p in soup.find_all("p")])
+        load_page(browser, url, "article")  # 等待正文段落出现且文档加载完成
+        text = paragraph_text(browser.page_source)
         english_text = re.sub(r"[^a-zA-Z\s]", "", text)
         return english_text
     except Exception as e:
         print(f"请求失败: {url} 错误: {e}")
         return ""
 
-def count_words_in_articles(urls, browser):
+def count_words_in_articles(urls, pool, on_update=None, max_workers=None, duplicates=None):
     """
     统计一组文章中每个单词的出现次数，排除停用词。
+    文章先以普通 HTTP 并发抓取，静态内容不足时才交给浏览器池渲染，每完成一篇就立即统计。
 
     参数:
-    urls (list of str): 文章的 URL 列表。
-    browser: Selenium WebDriver 实例。
+    urls (iterable of str): 文章的 URL 列表或生成器。
+    pool (BrowserPool): 需要渲染时使用的浏览器池。
+    on_update (callable): 每统计完一篇文章后以当前计数调用，例如 Checkpoint.update。
+    max_workers (int): HTTP 抓取并发数，默认取 config.FETCH_MAX_WORKERS。
+    duplicates (NearDuplicateIndex): 近似重复索引，转载和镜像页面不再分词和标注；为空时不检查。
 
     返回:
-    Counter: 包含每个单词及其出现次数的 Counter 对象。
+    WordCounter 或 ApproxCounter: 包含每个单词及其出现次数的计数器（由 config.COUNTER_MODE 决定）。
     """
-    all_words = Counter()
+    all_words = new_counter()
+    ensure_nltk_data("stopwords")
     stop_words = set(stopwords.words("english"))
 
     domain_specific_stopwords = {"google", "scholar", "nature", "www", "https", "com", "article", "bbc", "office", "said"}
@@ -114,14 +122,10 @@ def count_words_in_articles(urls, browser):
     # 定义名词、动词和形容词的词性标签
     allowed_pos = {"NN", "NNS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ", "JJ", "JJR", "JJS"}
 
-    for url in urls:
-        print(f"正在处理: {url}")
-        article_text = fetch_article_text(url, browser)
-        words = word_tokenize(article_text.lower())
-
-        # 词性标注
-        tagged_words = nltk.pos_tag(words)
+    def fetch(url):
+        return fetch_article_text_hybrid(url, pool, fetch_article_text)
 
+    def count_tagged(tagged_words):
         # 过滤停用词、领域停用词以及非名词/动词
         filtered_words = [
             word for word, pos in tagged_words
@@ -129,6 +133,10 @@ def count_words_in_articles(urls, browser):
         ]
 
         all_words.update(filtered_words)
+        if on_update:
+            on_update(all_words)
+
+    tag_articles(fetch_all(urls, fetch, max_workers=max_workers), tokenize, count_tagged, duplicates, urls)
     return all_words
 
 def save_to_json(word_counts, filename):
@@ -148,7 +156,14 @@ def save_to_json(word_counts, filename):
         json.dump(filtered_word_counts, f, indent=4)
     print(f"结果已保存到 {filename}")
 
-def selenium_crawl(query, engine="google", start_index=0, link_count=30):
+def save_to_store(word_counts, query, source):
+    """
+    移除中文后将统计结果写入词频存储。
+    """
+    get_word_store().save(query, source, {remove_chinese(key): value for key, value in word_counts.items()})
+    print(f"结果已保存到 {query}/{source}，{count_summary(word_counts)}")
+
+def selenium_crawl(query, engine="google", start_index=0, link_count=30, pool_size=None, max_workers=None, pool=None, stop=None):
     """
     主爬取函数，调用 Selenium 浏览器并获取搜索链接。
 
@@ -157,16 +172,22 @@ def selenium_crawl(query, engine="google", start_index=0, link_count=30):
     engine (str): 搜索引擎名称。
     start_index (int): 跳过的链接数量。
     link_count (int): 获取的链接数量。
+    pool_size (int): 浏览器池大小，默认取 config.BROWSER_POOL_SIZE。
+    max_workers (int): HTTP 抓取并发数，默认取 config.FETCH_MAX_WORKERS。
+    pool (BrowserPool): 多个任务共用的浏览器池，由调用方负责关闭；为空时新建一个。
+    stop (threading.Event): 被设置后停止计数，不再保存。
     """
-    browser = init_browser()
-    try:
-        urls = get_search_links(query, browser, engine, start_index, link_count)
-        print(f"使用 {engine} 搜索引擎获取的链接数量: {len(urls)}")
-        print("URLs:", urls)
-        word_counts = count_words_in_articles(urls, browser)
-        save_to_json(word_counts, filename=f"{query}_{engine}_word_counts.json")
-    finally:
-        browser.quit()  # 确保关闭浏览器
+    with nullcontext(pool) if pool else BrowserPool(init_browser, size=pool_size) as pool:  # 退出时确保关闭自建的浏览器
+        with pool.browser() as browser:
+            links = get_search_links(query, browser, engine, start_index, link_count)
+        print(f"使用 {engine} 搜索引擎获取的链接数量: {len(links)}")
+        print("URLs:", links)
+        # 抓取时才认领链接：同一运行中其他来源已经抓取的文档不再抓取，其他来源放弃的文档仍可补抓
+        urls = unique_links(links, query, engine)
+        # 每统计若干篇文章保存一次中间结果
+        checkpoint = Checkpoint(lambda counts: save_to_store(counts, query, engine), stop=stop)
+        word_counts = count_words_in_articles(urls, pool, checkpoint.update, max_workers, near_duplicate_index(query))
+        save_to_store(word_counts, query, engine)
 
 def main():
     """
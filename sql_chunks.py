@@ -0,0 +1,18 @@
+# SQLite 单条语句的参数个数上限（旧版本默认 999，留出余量给语句中的其他参数）
+SQL_CHUNK = 900
+
+
+def in_chunks(values, size=SQL_CHUNK):
+    """
+    把一组参数切成不超过 size 个的块，用于 "... IN (?, ?, ...)" 查询。
+
+    参数:
+    values (list): 参数列表。
+    size (int): 每块的参数个数，默认取 SQL_CHUNK。
+
+    返回:
+    generator: 依次产出 (块, 占位符字符串)，例如 (["a", "b"], "?,?")。
+    """
+    for start in range(0, len(values), size):
+        chunk = values[start:start + size]
+        yield chunk, ",".join("?" * len(chunk))
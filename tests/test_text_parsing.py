@@ -0,0 +1,73 @@
+import re
+
+import pytest
+from nltk.tokenize import NLTKWordTokenizer
+
+from html_parsing import available_backends, link_hrefs, paragraph_text, select_text
+from text_tokens import compile_filter, tokenize
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Fixture</title><style>p { color: red; }</style></head>
+<body>
+<nav><a href="/home">Home</a> <a>no link</a> <a href="https://example.com/a?x=1&amp;y=2">A</a></nav>
+<article>
+<p>Researchers <b>cannot</b> say whether the   model's gains will last &mdash; &amp; they&#39;re cautious.</p>
+<p>Gonna, wanna, gotta: the <a href="/news/articles/1">usual</a> informal words.</p>
+<p class="summary">  Leading and trailing spaces  </p>
+<div><p>Nested <span>paragraph <i>text</i></span></p></div>
+<p></p>
+<p>Caf&eacute; na&iuml;ve co&ouml;perate 2024 results</p>
+</article>
+<script>var p = "<p>not a paragraph</p>";</script>
+</body></html>
+"""
+
+TEXTS = [
+    "Researchers cannot say whether the models gains will last",
+    "Gonna wanna gotta lemme gimme are informal words",
+    "  mixed   Case\tand\nwhitespace  ",
+    "CANNOTcannot cannot",
+    "",
+]
+
+
+def clean(text):
+    # 与各爬虫的 fetch_article_text 相同的清洗
+    return re.sub(r"[^a-zA-Z\s]", "", text)
+
+
+def nltk_tokens(text):
+    return NLTKWordTokenizer().tokenize(text.lower())
+
+
+@pytest.mark.parametrize("text", TEXTS + [clean(paragraph_text(PAGE, backend="html.parser"))])
+def test_tokenize_matches_nltk(text):
+    assert tokenize(text) == nltk_tokens(text)
+
+
+@pytest.mark.parametrize("min_length", [1, 3, 4])
+def test_compile_filter_matches_nltk(min_length):
+    stop_words = {"the", "are", "can", "will"}
+    domain_words = {"words"}
+    filter_words = compile_filter(stop_words, domain_words, min_length=min_length)
+    for text in TEXTS:
+        expected = [
+            word for word in nltk_tokens(text)
+            if word.isalpha() and len(word) >= min_length and word not in stop_words | domain_words
+        ]
+        assert filter_words(text) == expected
+
+
+@pytest.mark.parametrize("backend", ["selectolax", "lxml"])
+def test_backends_match_html_parser(backend):
+    # selectolax 和 lxml 是可选依赖，未安装时跳过
+    if backend not in available_backends():
+        pytest.skip(f"{backend} is not installed")
+    assert paragraph_text(PAGE, backend="html.parser")
+    assert paragraph_text(PAGE, backend=backend) == paragraph_text(PAGE, backend="html.parser")
+    assert link_hrefs(PAGE, backend=backend) == link_hrefs(PAGE, backend="html.parser")
+    assert (
+        select_text(PAGE, "p.summary", only="p", strip=True, backend=backend)
+        == select_text(PAGE, "p.summary", only="p", strip=True, backend="html.parser")
+    )
+
@@ -0,0 +1,49 @@
+import pytest
+
+import translation
+from translation import GoogleBackend, StubBackend, TranslationCache, TranslationStage
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranslationCache(str(tmp_path / "translations.sqlite"))
+
+
+def test_stub_backend_fills_and_reuses_cache(cache):
+    backend = StubBackend({"hello": "你好", "world": "世界"})
+    stage = TranslationStage(backend, cache, chunk_chars=20, workers=1)
+
+    texts = ["hello", "world", "hello", "  ", "untranslated"]
+    assert stage.translate_many(texts) == ["你好", "世界", "你好", "  ", "untranslated"]
+    # 重复和空白的句子不发送给后端
+    assert backend.calls == [["hello", "world"], ["untranslated"]]
+    assert cache.get_many("stub", "en", "zh-cn", texts) == {"hello": "你好", "world": "世界", "untranslated": "untranslated"}
+
+    # 第二次全部来自缓存，不再调用后端
+    assert stage.translate_many(texts) == ["你好", "世界", "你好", "  ", "untranslated"]
+    assert len(backend.calls) == 2
+    assert stage.stats["cached"] == 3
+    assert stage.stats["translated"] == 3
+
+
+def test_long_text_is_split_and_cached_whole(cache):
+    backend = StubBackend()
+    stage = TranslationStage(backend, cache, chunk_chars=12, workers=2)
+    text = "First one. Second one. Third."
+
+    assert stage.translate_many([text]) == ["First one. Second one. Third."]
+    assert all(len(piece) <= 12 for call in backend.calls for piece in call)
+    assert cache.get_many("stub", "en", "zh-cn", [text]) == {text: text}
+
+
+def test_replay_keeps_originals_and_reports_once(cache, monkeypatch, capsys):
+    monkeypatch.setattr(translation, "is_replaying", lambda: True)
+    cache.put_many("google", "en", "zh-cn", {"cached title": "已缓存的标题"})
+    stage = TranslationStage(GoogleBackend(), cache, chunk_chars=20, workers=4)
+
+    titles = ["cached title"] + [f"title {i}" for i in range(10)]
+    assert stage.translate_many(titles) == ["已缓存的标题"] + titles[1:]
+    assert capsys.readouterr().out.count("不可用") == 1
+    assert stage.stats["failed"] == 10
+    # 失败的句子不写入缓存
+    assert cache.get_many("google", "en", "zh-cn", titles) == {"cached title": "已缓存的标题"}
@@ -0,0 +1,136 @@
+from collections import Counter
+import os
+import re
+import sys
+import time
+
+import config
+
+# 清洗后的文本只含英文字母和空白，连续的字母就是一个词
+_WORD = re.compile(r"[a-z]+")
+
+# word_tokenize（Treebank 规则）会把以下单词拆成两个，这里保持一致
+_SPLITS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+_SPLIT_WORDS = re.compile(r"\b(?:%s)\b" % "|".join(_SPLITS))
+
+
+def _expand(tokens):
+    expanded = []
+    for token in tokens:
+        expanded.extend(_SPLITS.get(token, (token,)))
+    return expanded
+
+
+def tokenize(text):
+    """
+    对已清洗的文本（re.sub(r"[^a-zA-Z\\s]", "", text) 之后）分词并转为小写。
+
+    结果与 word_tokenize(text.lower()) 相同，可以直接交给词性标注。
+    """
+    text = text.lower()
+    tokens = _WORD.findall(text)
+    if _SPLIT_WORDS.search(text):
+        tokens = _expand(tokens)
+    return tokens
+
+
+def compile_filter(*stopword_sets, min_length=1):
+    """
+    生成一个分词加过滤的函数，用于只统计词频、不需要词性的场景。
+
+    所有停用词集合合并为一个 frozenset，长度下限直接写进正则表达式，
+    分词、转小写、长度和停用词过滤在一次遍历中完成。
+
+    参数:
+    stopword_sets (iterable of str): 停用词集合，例如英文停用词和领域停用词。
+    min_length (int): 保留的单词的最小长度。
+
+    返回:
+    callable: 接收已清洗的文本，返回过滤后的单词列表；
+    与 [w for w in word_tokenize(text.lower()) if w.isalpha() and len(w) >= min_length and w not in 停用词] 相同。
+    """
+    stop_words = frozenset().union(*stopword_sets)
+    word = re.compile(r"[a-z]{%d,}" % max(min_length, 1))
+
+    def filter_words(text):
+        text = text.lower()
+        if _SPLIT_WORDS.search(text):
+            # 含有会被拆开的单词时，先拆开再检查长度
+            tokens = [token for token in _expand(word.findall(text)) if len(token) >= min_length]
+        else:
+            tokens = word.findall(text)
+        return [token for token in tokens if token not in stop_words]
+
+    return filter_words
+
+
+def _benchmark(texts, repeat):
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+    from nltk_resources import ensure_nltk_data
+
+    ensure_nltk_data("stopwords", "punkt_tab")
+    stop_words = set(stopwords.words("english"))
+    filter_words = compile_filter(stop_words)
+
+    def old_path():
+        counts = Counter()
+        for text in texts:
+            words = word_tokenize(text.lower())
+            counts.update(word for word in words if word.isalpha() and word not in stop_words)
+        return counts
+
+    def new_path():
+        counts = Counter()
+        for text in texts:
+            counts.update(filter_words(text))
+        return counts
+
+    results = {}
+    for name, path in (("word_tokenize", old_path), ("compile_filter", new_path)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            counts = path()
+        results[name] = (counts, (time.perf_counter() - start) / repeat)
+
+    (old_counts, old_time), (new_counts, new_time) = results.values()
+    print(f"word_tokenize   {old_time * 1000:8.1f} ms")
+    print(f"compile_filter  {new_time * 1000:8.1f} ms  ({old_time / new_time:.1f}x)")
+    print("identical counts:", old_counts == new_counts)
+
+
+def main():
+    """
+    在已保存的页面上比较 word_tokenize 路径与 compile_filter 的速度，并检查词频是否一致。
+
+    用法: python text_tokens.py [页面目录] [重复次数]
+    页面目录默认为 HTTP 缓存的正文目录。
+    """
+    from html_parsing import paragraph_text
+
+    page_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.HTTP_CACHE_DIR, "bodies")
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    texts = []
+    for name in sorted(os.listdir(page_dir)):
+        with open(os.path.join(page_dir, name), "rb") as f:
+            html = f.read().decode("utf-8", errors="replace")
+        # 与各爬虫的 fetch_article_text 相同的清洗
+        texts.append(re.sub(r"[^a-zA-Z\s]", "", paragraph_text(html)))
+    if not texts:
+        print(f"{page_dir} 中没有页面")
+        return
+
+    print(f"{len(texts)} pages, {sum(len(t) for t in texts) / 1024:.0f} KB of text, repeat {repeat}")
+    _benchmark(texts, repeat)
+
+
+if __name__ == "__main__":
+    main()
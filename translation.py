@@ -0,0 +1,313 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import re
+import sqlite3
+import sys
+import threading
+
+import config
+from page_archive import is_replaying
+from rate_limit import get_rate_limiter
+from sql_chunks import in_chunks
+
+# 超长句子优先在句末标点处切开
+_SENTENCE_END = re.compile(r"(?<=[。！？；.!?;])\s*")
+
+
+class BackendUnavailable(RuntimeError):
+    """
+    后端在当前运行中整体不可用（例如回放存档时不能访问网络），重试单个句子也不会成功。
+    """
+
+
+class TranslatorBackend:
+    """
+    翻译后端接口。
+
+    子类实现 translate_batch：把一组文本从 src 翻译到 dest，返回等长的译文列表；
+    失败时抛出异常，由 TranslationStage 退回逐句翻译或保留原文；整体不可用时抛出 BackendUnavailable。
+    """
+
+    name = "base"
+
+    def translate_batch(self, texts, src, dest):
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslatorBackend):
+    """
+    基于 googletrans 的后端。每个线程复用一个 Translator，一个块内的句子以换行连接后作为一个请求发送。
+    """
+
+    name = "google"
+
+    def __init__(self, service_urls=("translate.google.com",)):
+        self.service_urls = list(service_urls)
+        self._local = threading.local()
+
+    def _translator(self):
+        translator = getattr(self._local, "translator", None)
+        if translator is None:
+            # 只在确实需要翻译时导入 googletrans
+            from googletrans import Translator
+
+            translator = self._local.translator = Translator(service_urls=self.service_urls)
+        return translator
+
+    def translate_batch(self, texts, src, dest):
+        if is_replaying():
+            # 回放存档时不访问网络：只有缓存中的译文可用，其余句子保留原文
+            raise BackendUnavailable("translation service is not available while replaying the page archive")
+        get_rate_limiter().wait(f"https://{self.service_urls[0]}/")
+        result = self._translator().translate("\n".join(texts), src=src, dest=dest).text
+        lines = result.split("\n")
+        if len(lines) != len(texts):
+            raise ValueError(f"expected {len(texts)} translated lines, got {len(lines)}")
+        return [line.strip() for line in lines]
+
+
+class StubBackend(TranslatorBackend):
+    """
+    不访问网络的离线后端：按 mapping 查表，查不到的文本原样返回。
+
+    calls 记录每次调用收到的文本列表，便于离线检查分块和缓存行为。
+    """
+
+    name = "stub"
+
+    def __init__(self, mapping=None):
+        self.mapping = mapping or {}
+        self.calls = []
+
+    def translate_batch(self, texts, src, dest):
+        self.calls.append(list(texts))
+        return [self.mapping.get(text, text) for text in texts]
+
+
+BACKENDS = {backend.name: backend for backend in (GoogleBackend, StubBackend)}
+
+
+def create_backend(name=None):
+    """
+    按名称创建翻译后端，默认取 config.TRANSLATOR_BACKEND。
+    """
+    name = name or config.TRANSLATOR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的翻译后端: {name}")
+    return BACKENDS[name]()
+
+
+class TranslationCache:
+    """
+    按句保存译文的 SQLite 缓存，键为 (后端, 源语言, 目标语言, 原文)。
+    """
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or config.TRANSLATION_CACHE_FILE, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "backend TEXT NOT NULL, src TEXT NOT NULL, dest TEXT NOT NULL, text TEXT NOT NULL, "
+            "translated TEXT NOT NULL, PRIMARY KEY (backend, src, dest, text)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def get_many(self, backend, src, dest, texts):
+        """
+        返回已缓存的原文到译文的映射。
+        """
+        texts = list(texts)
+        found = {}
+        with self._lock:
+            # 每块另有 3 个参数用于后端和语言，SQL_CHUNK 已留出余量
+            for chunk, placeholders in in_chunks(texts):
+                found.update(self._db.execute(
+                    f"SELECT text, translated FROM translations "
+                    f"WHERE backend = ? AND src = ? AND dest = ? AND text IN ({placeholders})",
+                    [backend, src, dest, *chunk],
+                ))
+        return found
+
+    def put_many(self, backend, src, dest, translations):
+        """
+        保存原文到译文的映射。
+        """
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                [(backend, src, dest, text, translated) for text, translated in translations.items()],
+            )
+            self._db.commit()
+
+
+def split_long(text, max_chars):
+    """
+    把超过 max_chars 的文本在句末标点处切开，仍然过长的部分按长度硬切；不超过的文本原样返回。
+    """
+    if len(text) <= max_chars:
+        return [text]
+    pieces = []
+    for sentence in filter(None, _SENTENCE_END.split(text)):
+        for start in range(0, len(sentence), max_chars):
+            pieces.append(sentence[start:start + max_chars])
+    return pieces
+
+
+def chunk_texts(texts, max_chars):
+    """
+    把文本按顺序分组，每组以换行连接后不超过 max_chars 个字符。
+
+    参数:
+    texts (list of str): 每个都不超过 max_chars 的文本。
+    max_chars (int): 每组的最大字符数。
+
+    返回:
+    list of list: 分好的组。
+    """
+    chunks = []
+    current, size = [], 0
+    for text in texts:
+        extra = len(text) + (1 if current else 0)
+        if current and size + extra > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+            extra = len(text)
+        current.append(text)
+        size += extra
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TranslationStage:
+    """
+    带缓存的批量翻译。
+
+    先按句查缓存，只把未缓存的句子分成不超过 chunk_chars 个字符的块，由多个线程并发翻译；
+    一个块失败时退回逐句翻译，仍然失败的句子保留原文且不写入缓存；
+    后端整体不可用时不再逐句重试，只提示一次。
+    """
+
+    def __init__(self, backend=None, cache=None, chunk_chars=None, workers=None):
+        self.backend = backend or create_backend()
+        self.cache = cache or TranslationCache()
+        self.chunk_chars = chunk_chars or config.TRANSLATE_CHUNK_CHARS
+        self.workers = workers or config.TRANSLATE_WORKERS
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._unavailable_reported = False
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _translate_chunk(self, chunk, src, dest):
+        try:
+            translated = self.backend.translate_batch(chunk, src, dest)
+            self._count("requests")
+            return dict(zip(chunk, translated))
+        except BackendUnavailable as e:
+            with self._stats_lock:
+                self.stats["failed"] += len(chunk)
+                report, self._unavailable_reported = not self._unavailable_reported, True
+            if report:
+                print(f"翻译后端 {self.backend.name} 不可用，未缓存的句子保留原文：{e}")
+            return {}
+        except Exception as e:
+            if len(chunk) > 1:
+                # 整块失败（例如返回的行数不符）时逐句重试
+                result = {}
+                for text in chunk:
+                    result.update(self._translate_chunk([text], src, dest))
+                return result
+            print(f"翻译失败：{chunk[0][:50]}，错误：{e}")
+            self._count("failed")
+            return {}
+
+    def translate_many(self, texts, src="en", dest="zh-cn"):
+        """
+        翻译一组句子，返回等长的译文列表；空白句子原样返回。
+
+        参数:
+        texts (iterable of str): 要翻译的句子，例如新闻标题。
+        src (str): 源语言。
+        dest (str): 目标语言。
+
+        返回:
+        list of str: 与输入顺序一致的译文。
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(text for text in texts if text.strip()))
+        known = self.cache.get_many(self.backend.name, src, dest, unique)
+        self._count("cached", len(known))
+
+        missing = [text for text in unique if text not in known]
+        pieces = {text: split_long(text, self.chunk_chars) for text in missing}
+        chunks = chunk_texts(list(dict.fromkeys(p for parts in pieces.values() for p in parts)), self.chunk_chars)
+
+        translated_pieces = {}
+        if len(chunks) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+                for result in executor.map(lambda chunk: self._translate_chunk(chunk, src, dest), chunks):
+                    translated_pieces.update(result)
+        else:
+            for chunk in chunks:
+                translated_pieces.update(self._translate_chunk(chunk, src, dest))
+
+        new = {}
+        for text, parts in pieces.items():
+            if all(part in translated_pieces for part in parts):
+                new[text] = " ".join(translated_pieces[part] for part in parts)
+        if new:
+            self.cache.put_many(self.backend.name, src, dest, new)
+        self._count("translated", len(new))
+        known.update(new)
+        return [known.get(text, text) for text in texts]
+
+    def translate_text(self, text, src="en", dest="zh-cn"):
+        """
+        逐行翻译一段文本，保留换行结构。
+        """
+        return "\n".join(self.translate_many(text.split("\n"), src, dest))
+
+    def report(self):
+        """
+        返回翻译统计的可读字符串。
+        """
+        return (
+            f"Translation ({self.backend.name}): {self.stats['cached']} cached, {self.stats['translated']} translated "
+            f"in {self.stats['requests']} requests, {self.stats['failed']} failed"
+        )
+
+
+_stage = None
+_stage_lock = threading.Lock()
+
+
+def get_translation_stage():
+    """
+    获取进程内共享的翻译阶段（后端由 config.TRANSLATOR_BACKEND 决定），首次调用时创建。
+    """
+    global _stage
+    if _stage is None:
+        with _stage_lock:
+            if _stage is None:
+                _stage = TranslationStage()
+    return _stage
+
+
+def main():
+    """
+    逐行翻译标准输入并打印译文与统计。
+
+    用法: python translation.py [源语言] [目标语言] < 文本文件
+    """
+    src = sys.argv[1] if len(sys.argv) > 1 else "zh-cn"
+    dest = sys.argv[2] if len(sys.argv) > 2 else "en"
+    stage = get_translation_stage()
+    print(stage.translate_text(sys.stdin.read(), src, dest))
+    print(stage.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
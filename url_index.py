@@ -0,0 +1,311 @@
+from collections import Counter
+from contextlib import contextmanager
+import base64
+import binascii
+import sys
+import threading
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+import config
+from near_duplicates import NearDuplicateIndex
+
+# 只用于统计和追踪、不影响页面内容的查询参数
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "referrer", "spm", "cmpid", "icid",
+    "ved", "usg", "ei", "oq", "sxsrf", "rlz", "sourceid",
+})
+# 不在上面的参数可能决定页面内容，例如 GitHub 的 ?ref=main 指定分支，因此 ref、sa 等通用名称予以保留
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# 重定向包装最多展开的层数
+_MAX_UNWRAP = 3
+
+
+def _decode_bing(value):
+    # Bing 的 /ck/a?u=a1<base64> 链接：去掉 "a1" 前缀后是 URL 安全的 base64
+    if not value.startswith("a1"):
+        return None
+    data = value[2:]
+    try:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def unwrap_redirect(url):
+    """
+    展开搜索引擎的重定向链接，返回目标地址；不是重定向链接时返回 None。
+
+    支持 Google 的 /url?q=、DuckDuckGo 的 /l/?uddg=、Yahoo 的 .../RU=<地址>/RK=... 和 Bing 的 /ck/a?u=a1...。
+    """
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+    host = parts.netloc.lower()
+    if parts.path == "/url" and (not host or "google." in host):
+        return params.get("q") or params.get("url")
+    if parts.path.startswith("/l/") and (not host or host.endswith("duckduckgo.com")):
+        return params.get("uddg")
+    if host.endswith("search.yahoo.com") and "/RU=" in parts.path:
+        return unquote(parts.path.split("/RU=", 1)[1].split("/", 1)[0])
+    if host.endswith("bing.com") and parts.path == "/ck/a" and "u" in params:
+        return _decode_bing(params["u"])
+    return None
+
+
+def canonical_url(url):
+    """
+    把链接规范化为可以直接抓取的地址。
+
+    展开重定向包装，主机名转为小写并去掉默认端口，删除追踪参数和片段，其余查询参数按名称排序。
+
+    参数:
+    url (str): 搜索结果或页面中的链接，可以是 /url?q=... 这样的相对重定向链接。
+
+    返回:
+    str: 规范化的地址；不是 http/https 链接时返回 None。
+    """
+    url = url.strip()
+    for _ in range(_MAX_UNWRAP):
+        target = unwrap_redirect(url)
+        if not target:
+            break
+        url = target.strip()
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.rstrip(".")
+    if parts.port and str(parts.port) != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    ))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def url_key(url):
+    """
+    返回用于判断两个链接是否指向同一文档的键：在 canonical_url 的基础上忽略协议、"www." 前缀和路径末尾的斜杠。
+
+    返回:
+    str: 去重键；不是 http/https 链接时返回 None。
+    """
+    canonical = canonical_url(url)
+    if canonical is None:
+        return None
+    parts = urlsplit(canonical)
+    host = parts.netloc.removeprefix("www.")
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+class UrlIndex:
+    """
+    一次运行中所有来源共用的链接去重索引。
+
+    每个文档（按 url_key 判断）只交给第一个发现它的来源抓取；之后发现同一文档的来源不再抓取，
+    但仍被记录为发现者，运行结束后写入词频存储的 documents 表。
+    认领者抓取失败或得到空页面时调用 release() 放弃认领，其他发现者在产出完自己的链接后补抓该文档。
+    地址不同而正文近似相同的文档（转载、镜像）由 texts 在提取正文后识别。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 去重键 -> 规范化地址、抓取它的来源、所有发现它的来源
+        self._urls = {}
+        self._fetched_by = {}
+        self._found_by = {}
+        # 去重键 -> 抓取失败过的来源，补抓时不再交给它们
+        self._failed = {}
+        self.skipped = Counter()
+        self.released = 0
+        self.texts = NearDuplicateIndex()
+
+    def claim(self, url, source):
+        """
+        记录 source 发现了 url。
+
+        返回:
+        str: 该来源应当抓取的规范化地址；文档已被某个来源认领（包括该来源自己）或不是网页链接时返回 None。
+        """
+        key = url_key(url)
+        if key is None:
+            return None
+        with self._lock:
+            found_by = self._found_by.setdefault(key, [])
+            if source not in found_by:
+                found_by.append(source)
+            if key in self._fetched_by:
+                self.skipped[source] += 1
+                return None
+            self._urls[key] = canonical_url(url)
+            self._fetched_by[key] = source
+            return self._urls[key]
+
+    def release(self, url, source):
+        """
+        source 放弃对 url 的认领（抓取失败或页面为空），让其他发现它的来源可以补抓。
+
+        返回:
+        bool: 该文档此前是否由 source 认领；由其他来源认领时不做任何改动。
+        """
+        key = url_key(url)
+        with self._lock:
+            if self._fetched_by.get(key) != source:
+                return False
+            del self._fetched_by[key]
+            self._failed.setdefault(key, set()).add(source)
+            self.released += 1
+            return True
+
+    def _reclaim(self, source):
+        # 该来源发现过、认领者已放弃且尚无人接手的文档，交给该来源补抓
+        with self._lock:
+            keys = [
+                key for key, sources in self._found_by.items()
+                if key in self._urls and key not in self._fetched_by
+                and source in sources and source not in self._failed.get(key, ())
+            ]
+            for key in keys:
+                self._fetched_by[key] = source
+        return [self._urls[key] for key in keys]
+
+    def links(self, urls, source):
+        """
+        过滤一组链接（可以是生成器），只产出该来源需要抓取的规范化地址；
+        自己的链接产出完后，再产出该来源发现过、但认领者抓取失败而放弃的文档。
+        """
+        for url in urls:
+            claimed = self.claim(url, source)
+            if claimed is not None:
+                yield claimed
+        yield from self._reclaim(source)
+
+    def documents(self):
+        """
+        返回 (地址, 来源, 是否由该来源抓取) 的列表，每个文档对应每个发现它的来源一行。
+        """
+        with self._lock:
+            return [
+                (self._urls[key], source, source == self._fetched_by.get(key))
+                for key, sources in self._found_by.items() if key in self._urls
+                for source in sources
+            ]
+
+    def report(self):
+        """
+        返回去重统计的可读字符串。
+        """
+        with self._lock:
+            shared = sum(1 for sources in self._found_by.values() if len(sources) > 1)
+            return (
+                f"URL index: {len(self._urls)} unique documents, {shared} found by several sources, "
+                f"{sum(self.skipped.values())} duplicate links skipped, {self.released} failed claims released"
+            )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+@contextmanager
+def shared_url_index(query):
+    """
+    在 with 块内为查询提供一个共享的去重索引；同一查询的嵌套或并发运行共用同一个索引，
+    最后一个运行结束时释放，下一次运行重新抓取。
+    """
+    with _indexes_lock:
+        entry = _indexes.setdefault(query, [UrlIndex(), 0])
+        entry[1] += 1
+    try:
+        yield entry[0]
+    finally:
+        with _indexes_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _indexes[query]
+
+
+def get_url_index(query):
+    """
+    返回查询当前共享的去重索引，不在 shared_url_index 块内时返回 None。
+    """
+    entry = _indexes.get(query)
+    return entry[0] if entry else None
+
+
+class SourceLinks:
+    """
+    unique_links 的返回值：迭代时按需产出来源需要抓取的地址，并记住所属的索引和来源，
+    抓取失败时只放弃该查询、该来源自己的认领。
+    """
+
+    def __init__(self, index, urls, source):
+        self.index = index
+        self.source = source
+        self._links = index.links(urls, source)
+
+    def __iter__(self):
+        return self._links
+
+    def release(self, url):
+        return self.index.release(url, self.source)
+
+
+def unique_links(urls, query, source):
+    """
+    各来源在抓取前调用：规范化链接，去掉该来源自身的重复链接，
+    并跳过同一运行中其他来源已经认领的文档（在 shared_url_index 块内时）。
+
+    参数:
+    urls (iterable of str): 链接列表或边发现边产出的生成器。
+    query (str): 查询关键词。
+    source (str): 来源名称。
+
+    返回:
+    SourceLinks: 可迭代的规范化地址，抓取失败的地址用 release_link 放弃认领。
+    """
+    index = get_url_index(query) or UrlIndex()
+    return SourceLinks(index, urls, source)
+
+
+def release_link(urls, url):
+    """
+    各爬虫抓取失败或得到空页面时调用：urls 是 unique_links 返回的链接时，放弃该来源对 url 的认领，
+    同一查询中其他发现它的来源可以补抓；urls 是普通列表（不经去重直接抓取）时不做任何事。
+    """
+    if isinstance(urls, SourceLinks):
+        urls.release(url)
+
+
+def near_duplicate_index(query):
+    """
+    返回查询当前运行共用的近似重复索引；不在 shared_url_index 块内时返回新的索引（只在单个来源内去重），
+    config.NEAR_DUP_ENABLED 为假时返回 None。
+    """
+    if not config.NEAR_DUP_ENABLED:
+        return None
+    index = get_url_index(query)
+    return index.texts if index else NearDuplicateIndex()
+
+
+def main():
+    """
+    打印链接的规范化地址和去重键。
+
+    用法: python url_index.py 链接 [链接 ...]
+    """
+    for url in sys.argv[1:]:
+        print(url)
+        print("  canonical:", canonical_url(url))
+        print("  key:      ", url_key(url))
+
+
+if __name__ == "__main__":
+    main()
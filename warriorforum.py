@@ -1,55 +1,45 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from collections import Counter
-import time
+from contextlib import nullcontext
 import json
-import nltk
 import re
 
+from browser_factory import init_browser
+from browser_pool import BrowserPool
+from html_parsing import select_attr, select_text
+from page_wait import load_page, click_and_wait
+from pos_tagging import tag_articles
+from pipeline import Checkpoint, is_stopped
+from word_store import get_word_store
+from word_counter import count_summary, new_counter
+from text_tokens import tokenize
+from url_index import near_duplicate_index, unique_links
+from nltk_resources import ensure_nltk_data
+
+
 def remove_chinese(text):
     """
     移除文本中的中文字符。
     """
     return re.sub(r'[\u4e00-\u9fff]+', '', text)
 
-# 配置 Chrome Driver
-def init_browser():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 无头模式（不显示浏览器窗口）
-    chrome_options.add_argument("--disable-gpu")  # 禁用 GPU 加速
-    chrome_options.add_argument("--no-sandbox")  # 禁用沙盒模式
-    chrome_options.add_argument("--disable-dev-shm-usage")  # 禁用 /dev/shm 使用
-    service = Service("C:/Users/火箭筒/AppData/Local/Programs/Python/Python39/chromedriver.exe")  # 替换为你的 ChromeDriver 路径
-    browser = webdriver.Chrome(service=service, options=chrome_options)
-    return browser
-
 
-def get_cnki_links(query, browser, link_count=10):
+def iter_cnki_links(query, browser, link_count=10, stop=None):
     """
-    从知网搜索页面获取文章链接。
+    从知网搜索页面逐个产出文章链接，作为流水线的生产者边翻页边产出；stop 被设置后停止翻页。
     """
     search_url = f"https://www.warriorforum.com/search/{query}"
-    browser.get(search_url)
-    time.sleep(5)  # 等待页面加载
+    load_page(browser, search_url, "warriorforum_search")  # 等待搜索结果出现
 
     links = []
-    while len(links) < link_count:
-        soup = BeautifulSoup(browser.page_source, "html.parser")
-
+    while len(links) < link_count and not is_stopped(stop):
         # 提取符合条件的链接（这里需要根据知网的实际页面结构来调整）
-        for link in soup.find_all("h3", class_="ArticleSnapshot-title"):
+        for full_link in select_attr(browser.page_source, "h3.ArticleSnapshot-title a", "href", only="h3"):
             # if "c" in link["href"]:
-                full_link = link.a
-
-                full_link = full_link["href"]
 
                 # full_link = "https://boardgamegeek.com/" + full_link
                 links.append(full_link)
+                yield full_link
 
                 if len(links) >= link_count:
                     break
@@ -75,14 +65,19 @@ def get_cnki_links(query, browser, link_count=10):
         # 查找并点击“下一页”按钮（这里也需要根据知网的实际页面结构来调整）
         try:
             next_button = browser.find_element(By.XPATH,  "/html/body/div[1]/main/div[1]/section/div[2]/div/nav/ul/li[6]/a")
-            next_button.click()  # 点击下一页
-            time.sleep(3)  # 等待页面加载
+            click_and_wait(browser, next_button, "warriorforum_search")  # 点击下一页并等待新结果
         except Exception as e:
             print(f"没有找到下一页按钮或翻页出错，停止翻页：{e}")
             break
 
     print(f"提取到的有效链接: {links}")
-    return links
+
+
+def get_cnki_links(query, browser, link_count=10):
+    """
+    从知网搜索页面获取文章链接。
+    """
+    return list(iter_cnki_links(query, browser, link_count))
 
 
 def fetch_cnki_article_text(url, browser):
@@ -90,13 +85,10 @@ def fetch_cnki_article_text(url, browser):
     使用 Selenium 获取知网文章页面的文本内容。
     """
     try:
-        browser.get(url)
-        time.sleep(5)  # 等待页面加载
-        soup = BeautifulSoup(browser.page_source, "html.parser")
-
+        load_page(browser, url, "warriorforum_post")  # 等待帖子正文出现
         # 提取文章文本（这里需要根据知网文章页面的实际结构来调整）
-        abstract_element = soup.find("div", id="main-post")
-        abstract = abstract_element.get_text(strip=True) if abstract_element else "摘要未找到"
+        abstracts = select_text(browser.page_source, "div#main-post", only="div", strip=True)
+        abstract = abstracts[0] if abstracts else "摘要未找到"
 
         # 清洗文本，移除非英文字符等（根据需要调整）
         english_text = re.sub(r"[^a-zA-Z\s]", "", abstract)
@@ -108,26 +100,21 @@ def fetch_cnki_article_text(url, browser):
         return ""
 
 
-def count_words_in_cnki_articles(urls, browser):
+def count_words_in_cnki_articles(urls, pool, on_update=None, duplicates=None):
     """
     统计一组知网文章中每个单词的出现次数，排除停用词。
+    文章由浏览器池并行渲染，每渲染完成一篇就立即统计；与 duplicates 中已有文章近似重复的文章跳过。
     """
-    all_words = Counter()
+    all_words = new_counter()
+    ensure_nltk_data("stopwords")
     stop_words = set(stopwords.words("english"))
 
-    domain_specific_stopwords = {"cnki", "work", "www", "https", "com","also",,'im','take','want'}
+    domain_specific_stopwords = {"cnki", "work", "www", "https", "com","also",'im','take','want'}
 
     # 定义名词和动词的词性标签
     allowed_pos = {"NN", "NNS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ"}
 
-    for url in urls:
-        print(f"正在处理: {url}")
-        article_text = fetch_cnki_article_text(url, browser)
-        words = word_tokenize(article_text.lower())
-
-        # 词性标注
-        tagged_words = nltk.pos_tag(words)
-
+    def count_tagged(tagged_words):
         # 过滤停用词、领域停用词以及非名词/动词
         filtered_words = [
             word for word, pos in tagged_words
@@ -136,6 +123,10 @@ def count_words_in_cnki_articles(urls, browser):
         ]
 
         all_words.update(filtered_words)
+        if on_update:
+            on_update(all_words)
+
+    tag_articles(pool.map(fetch_cnki_article_text, urls), tokenize, count_tagged, duplicates, urls)
     return all_words
 
 
@@ -151,16 +142,30 @@ def save_to_json(word_counts, filename):
     print(f"结果已保存到 {filename}")
 
 
-def cnki_crawl(query, link_count=10):
+def save_to_store(word_counts, query, source):
+    """
+    移除中文后将统计结果写入词频存储。
+    """
+    get_word_store().save(query, source, {remove_chinese(key): value for key, value in word_counts.items()})
+    print(f"结果已保存到 {query}/{source}，{count_summary(word_counts)}")
+
+
+def cnki_crawl(query, link_count=10, pool_size=None, pool=None, stop=None):
     """
     主爬取函数，调用 Selenium 浏览器并获取知网的文章链接。
+    pool_size 为渲染文章的浏览器数量，默认取 config.BROWSER_POOL_SIZE；
+    传入 pool 时使用多个任务共用的浏览器池，由调用方负责关闭；stop 被设置后停止翻页和计数。
     """
+    checkpoint = Checkpoint(lambda counts: save_to_store(counts, query, "warriorforum"), stop=stop)
+
+    # 链接发现使用单独的浏览器，在后台边翻页边产出链接，浏览器池同时渲染已发现的文章
     browser = init_browser()
     try:
-        urls = get_cnki_links(query, browser, link_count)
-        print(f"获取的链接数量: {len(urls)}")
-        word_counts = count_words_in_cnki_articles(urls, browser)
-        save_to_json(word_counts, filename=f"{query}_word_counts.json")
+        with nullcontext(pool) if pool else BrowserPool(init_browser, size=pool_size) as pool:  # 退出时确保关闭自建的浏览器
+            # 同一运行中其他来源已经抓取的文档不再抓取
+            urls = unique_links(iter_cnki_links(query, browser, link_count, stop), query, "warriorforum")
+            word_counts = count_words_in_cnki_articles(urls, pool, checkpoint.update, near_duplicate_index(query))
+            save_to_store(word_counts, query, "warriorforum")
     finally:
         browser.quit()  # 确保关闭浏览器
 
@@ -1,65 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import sys
+import time
+
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import numpy as np
-import json
 from PIL import Image
 
+import config
+from pipeline import process_context
+from word_store import get_word_store
+
+# 所有词云共用的外观设置
+WORDCLOUD_OPTIONS = dict(
+    background_color='white',  # 设置背景颜色
+    max_words=200,             # 最多显示的单词数量
+    colormap='viridis',         # 颜色方案
+    contour_width=3,            # 轮廓宽度
+    contour_color='steelblue',   # 轮廓颜色
+    width = 1600,               #图片宽度
+    height = 1200,               #图片高度
+)
+
+# 每个进程只创建一次的 WordCloud 对象
+_renderer = None
 
-def get_word_counts(query):
+
+def get_word_counts(query, top_n=200):
     """
-    从指定的JSON文件中加载词频数据。
+    从词频存储中读取查询的合并结果，词云最多显示 200 个单词，因此只取次数最多的 top_n 个。
 
     参数:
-    - file_name: 包含词频数据的JSON文件的名称。
+    - query: 查询关键词。
+    - top_n: 读取的单词数量。
 
     返回:
     - word_counts: 一个字典，其中键是单词，值是这些单词在特定语境下的出现次数。
     """
-    # 打开文件并加载JSON格式的词频数据
-    file_name = f"{query}_word_counts.json"
-    with open(file_name, 'r', encoding='utf-8') as f:
-        word_counts = json.load(f)
-    # 返回解析后的词频数据
-    return word_counts
+    # 按次数排序的索引查询，不需要读入全部词频
+    return get_word_store().top(query, top_n)
+
+
+@lru_cache(maxsize=None)
+def load_mask(path=None):
+    """
+    读取并解码蒙版图片，每个进程只解码一次。
+    """
+    return np.array(Image.open(path or config.WORDCLOUD_MASK))
+
+
+def _get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = WordCloud(mask=load_mask(), **WORDCLOUD_OPTIONS)
+    return _renderer
+
+
+def _render(word_counts, output):
+    start = time.perf_counter()
+    # 直接由 PIL 写出 PNG，不经过 matplotlib
+    _get_renderer().generate_from_frequencies(word_counts).to_file(output)
+    return time.perf_counter() - start
+
+
+def render_wordcloud(word_counts, query):
+    """
+    无界面地生成词云并直接保存为 PNG。
+
+    参数:
+    word_counts (dict): 单词频率的字典，键为单词，值为频率。
+    query (str): 查询关键词，图片保存为 {query}_word_cloud.png。
+
+    返回:
+    tuple: (图片文件名, 渲染耗时秒数)
+    """
+    wordCloud_name = f"{query}_word_cloud.png"
+    seconds = _render(word_counts, wordCloud_name)
+    print(f'WordCloud of {query} has been saved as {wordCloud_name} ({seconds:.2f}s)')
+    return wordCloud_name, seconds
+
+
+def render_many(queries, processes=None):
+    """
+    在进程池中为多个查询渲染词云，每个进程只解码一次蒙版并复用同一个 WordCloud 对象。
+
+    参数:
+    queries (iterable of str): 查询关键词。
+    processes (int): 进程数，默认取 config.WORDCLOUD_PROCESSES。
+
+    返回:
+    generator: 按完成顺序产出 (查询, 图片文件名, 渲染耗时秒数)；没有词频的查询会被跳过。
+    """
+    # 词频在主进程中读取，工作进程只负责渲染
+    jobs = {}
+    for query in queries:
+        word_counts = get_word_counts(query)
+        if word_counts:
+            jobs[query] = word_counts
+        else:
+            print(f"{query} 没有词频数据，跳过词云")
+
+    # batch 在浏览器池和 HTTP 线程仍在运行的进程中调用，与标注进程池一样从 forkserver 派生工作进程
+    with ProcessPoolExecutor(
+        max_workers=processes or config.WORDCLOUD_PROCESSES, mp_context=process_context(), initializer=_get_renderer
+    ) as executor:
+        futures = {
+            executor.submit(_render, word_counts, f"{query}_word_cloud.png"): query
+            for query, word_counts in jobs.items()
+        }
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                print(f"{query} 词云生成失败: {e}")
+                continue
+            print(f'WordCloud of {query} has been saved as {query}_word_cloud.png ({seconds:.2f}s)')
+            yield query, f"{query}_word_cloud.png", seconds
 
 
 def get_wordcloud(word_counts,query):
     """
     根据单词频率生成词云。
-    该函数创建了一个词云对象，并设置了各种属性以定制词云的外观。
-    然后，使用matplotlib库显示生成的词云。
+    该函数使用共享的词云设置和缓存的蒙版生成词云，
+    然后，使用matplotlib库显示生成的词云，并保存为图片。无界面运行时使用 render_wordcloud。
 
     参数:
     word_counts (dict): 单词频率的字典，键为单词，值为频率。
     """
-    mask = np.array(Image.open("mask.png"))
-    # 创建词云对象并设置属性
-    wordcloud = WordCloud(
-        background_color='white',  # 设置背景颜色
-        max_words=200,             # 最多显示的单词数量
-        colormap='viridis',         # 颜色方案
-        contour_width=3,            # 轮廓宽度
-        contour_color='steelblue',   # 轮廓颜色
-        width = 1600,               #图片宽度
-        height = 1200,               #图片高度
-        mask = mask
-    ).generate_from_frequencies(word_counts)
+    import matplotlib.pyplot as plt
+
+    wordCloud_name, _ = render_wordcloud(word_counts, query)
 
     # 使用 matplotlib 显示词云
     plt.figure(figsize=(20, 15))  # 设置图像大小
-    plt.imshow(wordcloud, interpolation='bilinear')  # 绘制词云
+    plt.imshow(_get_renderer(), interpolation='bilinear')  # 绘制词云
     plt.axis("off")  # 关闭坐标轴
     plt.show()  # 显示图像
 
-    wordCloud_name = f"{query}_word_cloud.png"
-    # 如果你想保存词云为图片文件
-    wordcloud.to_file(wordCloud_name)
-    print(f'WordCloud of {query} has been saved as {wordCloud_name}!')
-
 def main():
-    query = "Computer"
-    word_counts = get_word_counts(query)
-    get_wordcloud(word_counts,query)
+    """
+    用法: python word_cloud.py 查询1 [查询2 ...]
+    无界面地批量生成词云，并报告每张图片的渲染耗时。
+    """
+    queries = sys.argv[1:] or ["Computer"]
+    start = time.perf_counter()
+    rendered = list(render_many(queries))
+    total = sum(seconds for _, _, seconds in rendered)
+    print(f"{len(rendered)} word clouds, render time {total:.1f}s, wall time {time.perf_counter() - start:.1f}s")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,230 @@
+from collections import Counter
+from collections.abc import Mapping
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+import config
+
+# 计数数组的整数类型：每个单词 4 字节
+_DTYPE = np.int32
+
+
+class Vocabulary:
+    """
+    单词与整数 id 的双向映射（字符串驻留）。
+
+    新单词用 sys.intern 驻留，多个计数器各自的词表引用同一个字符串对象，
+    每个单词的字符串在进程中只保存一份；计数器本身只保存按 id 排列的整数数组。
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._words = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._words)
+
+    def ids(self, words):
+        """
+        把一组单词转换为 id 数组，新单词按出现顺序分配新的 id。
+        """
+        get = self._ids.get
+        ids = [get(word) for word in words]
+        if None in ids:
+            with self._lock:
+                for i, word in enumerate(words):
+                    if ids[i] is None:
+                        word_id = self._ids.get(word)
+                        if word_id is None:
+                            # 先追加单词再公开 id：并发的 word(id) 不会读到尚未追加的位置
+                            word = sys.intern(word)
+                            word_id = len(self._words)
+                            self._words.append(word)
+                            self._ids[word] = word_id
+                        ids[i] = word_id
+        return np.fromiter(ids, dtype=np.intp, count=len(ids))
+
+    def id(self, word):
+        """
+        返回单词的 id，词表中没有该单词时返回 None。
+        """
+        return self._ids.get(word)
+
+    def word(self, word_id):
+        return self._words[word_id]
+
+
+class WordCounter(Mapping):
+    """
+    以词表 id 为下标、保存在 NumPy 数组中的单词计数器。
+
+    用法与 collections.Counter 的常用部分相同（update、most_common、按单词取值、items），
+    未出现的单词计数为 0。每个计数器默认使用自己的词表，数组大小只取决于它见过的单词数，
+    不会随长时间批量运行中其他任务的词汇增长。
+    """
+
+    def __init__(self, words=None, vocabulary=None):
+        self.vocabulary = vocabulary or Vocabulary()
+        self._counts = np.zeros(0, dtype=_DTYPE)
+        if words is not None:
+            self.update(words)
+
+    def _grow(self, size):
+        # 一次扩展到当前词表大小，只有词表出现新单词后才需要再次扩展
+        if size > len(self._counts):
+            counts = np.zeros(max(size, len(self.vocabulary)), dtype=_DTYPE)
+            counts[:len(self._counts)] = self._counts
+            self._counts = counts
+
+    def update(self, words):
+        """
+        累加一组单词（可以重复）的出现次数。
+        """
+        # 先在 C 实现的 Counter 中去重计数，只有不同的单词才需要查词表
+        distinct = Counter(words)
+        if not distinct:
+            return
+        ids = self.vocabulary.ids(list(distinct))
+        self._grow(int(ids.max()) + 1)
+        self._counts[ids] += np.fromiter(distinct.values(), dtype=_DTYPE, count=len(distinct))
+
+    @property
+    def array(self):
+        """
+        按词表 id 排列的计数数组（只读视图）。
+        """
+        view = self._counts[:]
+        view.flags.writeable = False
+        return view
+
+    def __getitem__(self, word):
+        word_id = self.vocabulary.id(word)
+        if word_id is None or word_id >= len(self._counts):
+            return 0
+        return int(self._counts[word_id])
+
+    def __contains__(self, word):
+        return self[word] > 0
+
+    def __iter__(self):
+        for word_id in np.flatnonzero(self._counts).tolist():
+            yield self.vocabulary.word(word_id)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._counts))
+
+    def to_dict(self):
+        """
+        转换为普通的 {单词: 次数} 字典（值为 Python int，可直接写入 JSON 或 SQLite）。
+        """
+        word_ids = np.flatnonzero(self._counts)
+        return dict(zip(map(self.vocabulary.word, word_ids.tolist()), self._counts[word_ids].tolist()))
+
+    def items(self):
+        return self.to_dict().items()
+
+    def most_common(self, n=None):
+        """
+        返回次数最多的 n 个 (单词, 次数)，按次数从高到低排列；n 为空时返回全部。
+        """
+        return top_n(self._counts, n, self.vocabulary)
+
+
+def new_counter():
+    """
+    按 config.COUNTER_MODE 创建计数函数使用的计数器：
+    "exact" 为 WordCounter，"approx" 为内存固定的 approx_counter.ApproxCounter。
+    """
+    if config.COUNTER_MODE == "approx":
+        from approx_counter import ApproxCounter
+        return ApproxCounter()
+    return WordCounter()
+
+
+def count_summary(counts):
+    """
+    返回计数器的简要说明；近似计数器附带误差范围。
+    """
+    if hasattr(counts, "error_bounds"):
+        bounds = counts.error_bounds()
+        return (
+            f"近似计数: 共 {bounds['total']} 个单词，跟踪前 {len(counts)} 个；"
+            f"估计值最多高估 {bounds['sketch_error']:.1f}（置信度 {bounds['sketch_confidence']:.1%}）"
+        )
+    return f"精确计数: {len(counts)} 个不同单词"
+
+
+def top_n(counts, n, vocabulary):
+    """
+    用 argpartition 从按 id 排列的计数数组中选出次数最多的 n 个单词，只对这 n 个排序。
+
+    返回:
+    list: [(单词, 次数), ...]，按次数从高到低排列，不包含次数为 0 的单词。
+    """
+    nonzero = int(np.count_nonzero(counts))
+    if n is None or n >= nonzero:
+        word_ids = np.flatnonzero(counts)
+    elif n <= 0:
+        return []
+    else:
+        word_ids = np.argpartition(counts, -n)[-n:]
+    # 稳定排序：次数相同时按 id（即首次出现的先后）排列
+    word_ids = word_ids[np.argsort(-counts[word_ids], kind="stable")]
+    return list(zip(map(vocabulary.word, word_ids.tolist()), counts[word_ids].tolist()))
+
+
+def _benchmark(sources, words_per_source, vocab_size):
+    # 模拟多个来源的词频：单词按 Zipf 分布抽取
+    rng = random.Random(0)
+    vocab = [f"word{i}" for i in range(vocab_size)]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+    samples = [rng.choices(vocab, weights, k=words_per_source) for _ in range(sources)]
+
+    def measure(build):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return result, elapsed, memory
+
+    counters, build_dict, dict_mem = measure(lambda: [Counter(sample) for sample in samples])
+    vectors, build_vec, vec_mem = measure(lambda: [WordCounter(sample) for sample in samples])
+
+    # 各来源的前 200 个单词（合并多个来源由词频存储中的 SQL 求和完成）
+    start = time.perf_counter()
+    top_dict = [counter.most_common(200) for counter in counters]
+    top_dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top_vec = [counter.most_common(200) for counter in vectors]
+    top_vec_time = time.perf_counter() - start
+
+    assert [[count for _, count in top] for top in top_dict] == [[count for _, count in top] for top in top_vec]
+    print(f"{sources} sources x {words_per_source} words, vocabulary {vocab_size}")
+    print(f"{'':<12}{'build':>10}{'memory':>12}{'top-200':>12}")
+    print(f"{'Counter':<12}{build_dict:>9.2f}s{dict_mem / 1e6:>10.1f}MB{top_dict_time * 1000:>10.1f}ms")
+    print(f"{'WordCounter':<12}{build_vec:>9.2f}s{vec_mem / 1e6:>10.1f}MB{top_vec_time * 1000:>10.1f}ms")
+
+
+def main():
+    """
+    比较 Counter 与 WordCounter 的构建时间、内存和取前 200 个单词的耗时。
+
+    用法: python word_counter.py [来源数] [每个来源的单词数] [词表大小]
+    """
+    sources = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    words_per_source = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    vocab_size = int(sys.argv[3]) if len(sys.argv) > 3 else 50000
+    _benchmark(sources, words_per_source, vocab_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+import config
+from sql_chunks import in_chunks
+
+# 合并并按词性过滤后的结果保存在这个来源名下
+MERGED = "merged"
+
+
+class WordStore:
+    """
+    按查询、来源和单词保存词频的 SQLite 存储。
+
+    单词只在 vocab 表中保存一次，计数表以 (query, source, word_id) 为主键存放整数；
+    合并多个来源和取前 k 个单词都是带索引的 SQL 查询，不需要读入全部 JSON 再求和。
+    """
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        # 已超时的 (查询, 来源)：仍在运行的线程写入的计数不再接受
+        self._fenced = set()
+        self._db = sqlite3.connect(path or config.WORD_STORE_FILE, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS vocab (
+                id INTEGER PRIMARY KEY,
+                word TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS counts (
+                query TEXT NOT NULL,
+                source TEXT NOT NULL,
+                word_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (query, source, word_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS counts_top ON counts (query, source, count DESC);
+            CREATE TABLE IF NOT EXISTS runs (
+                query TEXT NOT NULL,
+                source TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (query, source)
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                query TEXT NOT NULL,
+                url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                fetched INTEGER NOT NULL,
+                PRIMARY KEY (query, url, source)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._db.commit()
+
+    def _word_ids(self, words):
+        # 新单词加入词表，返回单词到 id 的映射
+        self._db.executemany("INSERT OR IGNORE INTO vocab (word) VALUES (?)", ((word,) for word in words))
+        ids = {}
+        for chunk, placeholders in in_chunks(words):
+            ids.update(self._db.execute(f"SELECT word, id FROM vocab WHERE word IN ({placeholders})", chunk))
+        return ids
+
+    def fence(self, query, source):
+        """
+        拒绝之后对 (query, source) 的写入，用于已经超时、结果已被合并的来源。
+        """
+        with self._lock:
+            self._fenced.add((query, source))
+
+    def unfence(self, query, source):
+        """
+        重新允许写入 (query, source)，新一次运行开始时调用。
+        """
+        with self._lock:
+            self._fenced.discard((query, source))
+
+    def _write(self, query, source, word_counts, replace):
+        words = [word for word, count in word_counts.items() if word and count]
+        with self._lock:
+            if (query, source) in self._fenced:
+                print(f"{query}/{source} 已超时，忽略此次写入")
+                return
+            ids = self._word_ids(words)
+            if replace:
+                self._db.execute("DELETE FROM counts WHERE query = ? AND source = ?", (query, source))
+            self._db.executemany(
+                """
+                INSERT INTO counts (query, source, word_id, count) VALUES (?, ?, ?, ?)
+                ON CONFLICT (query, source, word_id) DO UPDATE SET count = count + excluded.count
+                """,
+                ((query, source, ids[word], word_counts[word]) for word in words),
+            )
+            self._db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)", (query, source, time.time()))
+            self._db.commit()
+
+    def save(self, query, source, word_counts):
+        """
+        用 word_counts 替换某个查询在某个来源下的全部计数（例如定期保存的中间结果）。
+        """
+        self._write(query, source, word_counts, replace=True)
+
+    def add(self, query, source, word_counts):
+        """
+        把 word_counts 累加到已有计数上（增量更新）。
+        """
+        self._write(query, source, word_counts, replace=False)
+
+    def _select(self, query, sources, limit):
+        if len(sources) == 1:
+            # 单个来源（例如合并结果）不需要求和，按 counts_top 索引的顺序直接取前 limit 行
+            sql = """
+                SELECT vocab.word, counts.count
+                FROM counts JOIN vocab ON vocab.id = counts.word_id
+                WHERE counts.query = ? AND counts.source = ?
+                ORDER BY counts.count DESC
+            """
+            params = [query, sources[0]]
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(limit)
+            with self._lock:
+                return self._db.execute(sql, params).fetchall()
+
+        placeholders = ",".join("?" * len(sources))
+        sql = f"""
+            SELECT vocab.word, SUM(counts.count) AS total
+            FROM counts JOIN vocab ON vocab.id = counts.word_id
+            WHERE counts.query = ? AND counts.source IN ({placeholders})
+            GROUP BY counts.word_id
+            ORDER BY total DESC
+        """
+        params = [query, *sources]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def counts(self, query, sources):
+        """
+        合并某个查询在若干来源下的计数。
+
+        参数:
+        query (str): 查询关键词。
+        sources (list of str): 要合并的来源。
+
+        返回:
+        dict: 单词到合计次数的映射，按次数从高到低排列。
+        """
+        return dict(self._select(query, list(sources), None))
+
+    def top(self, query, k, sources=(MERGED,)):
+        """
+        返回某个查询在若干来源下合计次数最多的 k 个单词，默认取合并后的结果。
+        """
+        return dict(self._select(query, list(sources), k))
+
+    def updated_at(self, query, source):
+        """
+        返回某个查询在某个来源下最后一次写入的时间戳，从未写入时返回 None。
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT updated_at FROM runs WHERE query = ? AND source = ?", (query, source)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_documents(self, query, documents):
+        """
+        用本次运行的去重结果替换某个查询的文档归属。
+
+        参数:
+        query (str): 查询关键词。
+        documents (list of tuple): (地址, 来源, 是否由该来源抓取)，见 UrlIndex.documents。
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM documents WHERE query = ?", (query,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                ((query, url, source, int(fetched)) for url, source, fetched in documents),
+            )
+            self._db.commit()
+
+    def documents(self, query):
+        """
+        返回某个查询的每个文档及发现它的全部来源（抓取它的来源在最前面）。
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, source FROM documents WHERE query = ? ORDER BY url, fetched DESC, source", (query,)
+            ).fetchall()
+        found = {}
+        for url, source in rows:
+            found.setdefault(url, []).append(source)
+        return found
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_word_store():
+    """
+    获取进程内共享的词频存储，首次调用时创建。
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WordStore()
+    return _store
+
+
+def main():
+    """
+    用法:
+    python word_store.py 查询 [k]                       显示合并结果中次数最多的 k 个单词（默认 20）
+    python word_store.py import 查询 来源 旧的JSON文件   导入以前保存的 *_word_counts.json
+    python word_store.py documents 查询                 列出查询的文档及发现它的来源
+    """
+    store = get_word_store()
+    if len(sys.argv) == 3 and sys.argv[1] == "documents":
+        for url, sources in store.documents(sys.argv[2]).items():
+            print(f"{', '.join(sources):30s}  {url}")
+        return
+    if len(sys.argv) == 5 and sys.argv[1] == "import":
+        query, source, file_name = sys.argv[2:]
+        with open(file_name, "r", encoding="utf-8") as f:
+            store.save(query, source, json.load(f))
+        print(f"{file_name} 已导入为 {query}/{source}")
+        return
+
+    query = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for word, count in store.top(query, k).items():
+        print(f"{count:8d}  {word}")
+
+
+if __name__ == "__main__":
+    main()